@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于asyncio的抖音视频抓取器
+同一博主的分页按 max_cursor 依次请求，多个博主并发抓取；
+全局并发数和每个主机的请求间隔可配置，产出的视频信息与 DouyinScraper 完全一致；
+分页缓存、短链接和断点的磁盘读写在线程池中执行，不阻塞其他博主的请求
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，仅在使用异步抓取器时需要
+    aiohttp = None
+
+from douyin_parser import load_posts_response
+from douyin_scraper import DouyinScraper, PageSizeTuner
+from video_record import VideoRecord
+from log_setup import setup_logging
+
+
+logger = logging.getLogger('douyin_scraper.async')
+
+
+class HostThrottle:
+    """按主机限制请求间隔，同一主机相邻两次请求至少间隔 interval 秒"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._locks = {}
+        self._last_request = {}
+
+    async def wait(self, url: str):
+        """等待到该主机允许发出下一个请求"""
+        if self.interval <= 0:
+            return
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._last_request.get(host, 0.0) + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request[host] = time.monotonic()
+
+
+class AsyncDouyinScraper:
+    """
+    异步抖音视频抓取器，需在 async with 中使用:
+
+        async with AsyncDouyinScraper(max_concurrency=8) as scraper:
+            results = await scraper.fetch_many(urls, max_videos=100)
+    """
+
+    def __init__(self, api_base_url: str = "https://douyin-api.xiaomiao.win", max_concurrency: int = 8,
+                 host_interval: float = 0.2, page_delay: float = 1.0, timeout: float = 30.0,
+                 page_cache=None, link_cache=None, page_size_store=None):
+        if aiohttp is None:
+            raise ImportError("使用异步抓取器需要先安装 aiohttp: pip install aiohttp")
+
+        self.api_base_url = api_base_url
+        self.max_concurrency = max(1, max_concurrency)
+        self.page_delay = page_delay
+        self.timeout = timeout
+        self.throttle = HostThrottle(host_interval)
+        # 与同步抓取器共用的分页响应磁盘缓存（douyin_cache.PageCache）
+        self.page_cache = page_cache
+        # 与同步抓取器共用的短链接解析结果存储（sync_state.SyncStateStore）
+        self.link_cache = link_cache
+        # 与同步抓取器相同的每页视频数学习，所有博主共用
+        self.page_sizes = PageSizeTuner(api_base_url, page_size_store)
+        # 每个博主实际发出的视频列表请求次数（不含缓存命中）
+        self.request_counts = Counter()
+        self.session = None
+        self._semaphore = None
+        setup_logging()
+
+    async def __aenter__(self):
+        # 会话和信号量必须在事件循环内创建
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(
+            headers=DouyinScraper.HEADERS,
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    @staticmethod
+    async def _offload(func: Callable, *args):
+        """在线程池中执行磁盘缓存和SQLite的读写，不阻塞事件循环中其他博主的请求"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _get_json(self, url: str, params: Dict, loads: Callable = json.loads) -> Dict:
+        """受全局并发数和主机间隔限制的GET请求"""
+        async with self._semaphore:
+            await self.throttle.wait(url)
+            query = {key: str(value) for key, value in params.items()}
+            async with self.session.get(url, params=query) as response:
+                response.raise_for_status()
+                return loads(await response.read())
+
+    async def resolve_short_link(self, douyin_url: str) -> Optional[str]:
+        """与 DouyinScraper.resolve_short_link 相同：逐跳跟随重定向，每跳单独超时，地址中一出现sec_user_id即停止"""
+        url = douyin_url
+        timeout = aiohttp.ClientTimeout(total=DouyinScraper.RESOLVE_TIMEOUT)
+        for _ in range(DouyinScraper.MAX_REDIRECTS):
+            async with self._semaphore:
+                await self.throttle.wait(url)
+                async with self.session.head(url, allow_redirects=False, timeout=timeout) as response:
+                    location = response.headers.get('Location')
+            if not location:
+                break
+            url = urljoin(url, location)
+            sec_user_id = DouyinScraper._match_redirect(url)
+            if sec_user_id:
+                return sec_user_id
+
+        sec_user_id = DouyinScraper.match_sec_user_id(url)
+        if not sec_user_id:
+            logger.warning("无法从URL中提取sec_user_id: %s", url)
+        return sec_user_id
+
+    async def extract_sec_user_id(self, douyin_url: str) -> Optional[str]:
+        """从抖音主页链接中提取sec_user_id，短链接优先使用已保存的解析结果，否则跟随重定向"""
+        try:
+            if DouyinScraper.is_short_link(douyin_url):
+                if self.link_cache is not None:
+                    sec_user_id = await self._offload(self.link_cache.get_short_link, douyin_url)
+                    if sec_user_id:
+                        return sec_user_id
+                sec_user_id = await self.resolve_short_link(douyin_url)
+                if sec_user_id and self.link_cache is not None:
+                    await self._offload(self.link_cache.save_short_link, douyin_url, sec_user_id)
+                return sec_user_id
+
+            sec_user_id = DouyinScraper.match_sec_user_id(douyin_url)
+            if sec_user_id:
+                return sec_user_id
+
+            logger.warning("无法从URL中提取sec_user_id: %s", douyin_url)
+            return None
+
+        except Exception as e:
+            logger.error("提取sec_user_id时出错: %s", e)
+            return None
+
+    async def fetch_user_videos(self, sec_user_id: str, max_cursor: int = 0, count: int = 20,
+                                retry_count: int = 0) -> Dict:
+        """获取用户的一页视频列表，失败和空页的重试方式与同步版本一致"""
+        if self.page_cache is not None and retry_count == 0:
+            cached = await self._offload(self.page_cache.get, self.api_base_url, sec_user_id, max_cursor)
+            if cached is not None:
+                return cached
+
+        url = f"{self.api_base_url}{DouyinScraper.USER_POSTS_PATH}"
+        params = DouyinScraper.build_request_params(sec_user_id, max_cursor, count, retry_count)
+
+        try:
+            self.request_counts[sec_user_id] += 1
+            # 解码时只保留 parse_video_info 用到的字段
+            data = await self._get_json(url, params, load_posts_response)
+        except Exception as e:
+            logger.error("获取视频列表时出错: %s", e)
+            if retry_count < 2:
+                await asyncio.sleep(3)
+                return await self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
+            return {}
+
+        if data.get('code') != 200:
+            logger.error("API返回错误: code=%s, message=%s", data.get('code'), data.get('message', ''))
+            if retry_count < 2:
+                await asyncio.sleep(3)
+                return await self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
+            return {}
+
+        result_data = data.get('data', {})
+
+        # 翻页后返回空数据时换一组参数重试
+        if not result_data.get('aweme_list') and max_cursor > 0 and retry_count < 2:
+            await asyncio.sleep(5)
+            return await self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
+
+        if self.page_cache is not None and result_data.get('aweme_list'):
+            await self._offload(self.page_cache.put, self.api_base_url, sec_user_id, max_cursor, count, result_data)
+
+        return result_data
+
+    async def iter_video_pages(self, douyin_url: str, max_videos: int = 1000,
+                               checkpoint_store=None, resume: bool = False,
+                               high_water_mark: Optional[Dict] = None,
+                               progress: Optional[Dict] = None) -> AsyncIterator[List[VideoRecord]]:
+        """
+        逐页获取用户的视频信息，同一用户的分页依次请求，产出的视频总数不超过 max_videos
+        传入 high_water_mark 时只产出比它新的视频，翻到越过高水位的一页即停止
+        progress 与 DouyinScraper.iter_video_pages 相同，结束后写入 progress['complete']
+        """
+        if progress is not None:
+            progress['complete'] = False
+        sec_user_id = await self.extract_sec_user_id(douyin_url)
+        if not sec_user_id:
+            return
+
+        fetched_count = 0
+        max_cursor = 0
+        page_num = 1
+        has_more_pages = True
+        start_requests = self.request_counts[sec_user_id]
+        start_time = time.monotonic()
+        complete = False
+
+        if checkpoint_store is not None:
+            checkpoint = (await self._offload(checkpoint_store.load_scrape_checkpoint, sec_user_id)
+                          if resume else None)
+            if checkpoint:
+                saved_videos = [VideoRecord.from_dict(video) for video in checkpoint['videos'][:max_videos]]
+                max_cursor = checkpoint['max_cursor']
+                page_num = checkpoint['page_num']
+                has_more_pages = checkpoint['has_more']
+                if saved_videos:
+                    fetched_count = len(saved_videos)
+                    yield saved_videos
+            else:
+                await self._offload(checkpoint_store.clear_scrape_checkpoint, sec_user_id)
+
+        while has_more_pages and fetched_count < max_videos:
+            count = self.page_sizes.next_count(max_videos - fetched_count)
+            requests_before = self.request_counts[sec_user_id]
+            data = await self.fetch_user_videos(sec_user_id, max_cursor=max_cursor, count=count)
+
+            aweme_list = data.get('aweme_list', []) if data else []
+            if not aweme_list:
+                # 与同步版本相同：只有正常返回的空页且还有下一页时才回退每页视频数
+                if data and data.get('has_more', 0) == 1 and await self._offload(self.page_sizes.reject, count):
+                    continue
+                complete = bool(data) and data.get('has_more', 0) != 1
+                break
+            # 缓存的页面条目数取决于当时的请求数，只按接口实际返回的页面学习每页视频数
+            if self.request_counts[sec_user_id] != requests_before:
+                await self._offload(self.page_sizes.observe, count, len(aweme_list), data.get('has_more', 0) == 1)
+
+            page_videos = []
+            for video in aweme_list:
+                video_info = DouyinScraper.parse_video_info(video)
+                if video_info:
+                    page_videos.append(video_info)
+            page_videos, reached_mark = DouyinScraper.apply_high_water_mark(page_videos, high_water_mark)
+
+            # 确保不超过用户指定的数量，截断时被丢弃的视频还未同步，不算抓取完整
+            truncated = fetched_count + len(page_videos) > max_videos
+            page_videos = page_videos[:max_videos - fetched_count]
+            fetched_count += len(page_videos)
+
+            has_more = data.get('has_more', 0)
+            new_max_cursor = data.get('max_cursor', 0)
+            complete = (reached_mark or has_more != 1) and not truncated
+
+            if checkpoint_store is not None:
+                await self._offload(
+                    checkpoint_store.save_scrape_page,
+                    sec_user_id, page_num, page_videos, new_max_cursor,
+                    has_more == 1 and new_max_cursor != max_cursor and not reached_mark
+                )
+
+            yield page_videos
+
+            if reached_mark or has_more != 1 or new_max_cursor == max_cursor:
+                break
+
+            max_cursor = new_max_cursor
+            page_num += 1
+
+            if fetched_count >= max_videos:
+                break
+
+            # 同一用户的相邻两页之间保持间隔
+            await asyncio.sleep(self.page_delay)
+
+        logger.info("%s: 请求接口 %d 次，获取 %d 个视频，耗时 %.1f 秒，每页请求 %d 条",
+                    sec_user_id, self.request_counts[sec_user_id] - start_requests, fetched_count,
+                    time.monotonic() - start_time, self.page_sizes.page_size)
+        if progress is not None:
+            progress['complete'] = complete
+
+    async def fetch_all_videos(self, douyin_url: str, max_videos: int = 1000,
+                               checkpoint_store=None, resume: bool = False,
+                               high_water_mark: Optional[Dict] = None,
+                               progress: Optional[Dict] = None) -> List[VideoRecord]:
+        """获取单个用户的视频信息，high_water_mark / progress 见 iter_video_pages"""
+        all_videos = []
+        async for page_videos in self.iter_video_pages(douyin_url, max_videos, checkpoint_store, resume,
+                                                       high_water_mark, progress):
+            all_videos.extend(page_videos)
+        logger.info("%s: 共获取 %d 个视频", douyin_url, len(all_videos))
+        return all_videos
+
+    async def fetch_many(self, douyin_urls: List[str], max_videos: int = 1000,
+                         checkpoint_store=None, resume: bool = False,
+                         high_water_marks: Optional[Dict[str, Dict]] = None,
+                         progress: Optional[Dict[str, Dict]] = None) -> Dict[str, List[VideoRecord]]:
+        """
+        并发抓取多个用户，返回 链接 -> 视频列表；单个用户失败时返回空列表
+        high_water_marks: 链接 -> 该用户的高水位，只抓取比它新的视频
+        progress: 传入时写入 链接 -> {'complete': 是否抓取完整}，用于决定能否推进各用户的高水位
+        """
+        high_water_marks = high_water_marks or {}
+
+        async def fetch_one(douyin_url):
+            url_progress = progress.setdefault(douyin_url, {}) if progress is not None else None
+            try:
+                return await self.fetch_all_videos(douyin_url, max_videos, checkpoint_store, resume,
+                                                   high_water_marks.get(douyin_url), url_progress)
+            except Exception as e:
+                logger.error("抓取 %s 时出错: %s", douyin_url, e)
+                if url_progress is not None:
+                    url_progress['complete'] = False
+                return []
+
+        results = await asyncio.gather(*(fetch_one(douyin_url) for douyin_url in douyin_urls))
+        return dict(zip(douyin_urls, results))
+
+
+def fetch_many_videos(douyin_urls: List[str], max_videos: int = 1000, **scraper_options) -> Dict[str, List[VideoRecord]]:
+    """同步入口：并发抓取多个用户的视频信息"""
+    async def run():
+        async with AsyncDouyinScraper(**scraper_options) as scraper:
+            return await scraper.fetch_many(douyin_urls, max_videos)
+
+    return asyncio.run(run())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准脚本
+使用本地模拟的多维表格接口或合成数据测量各环节耗时，不访问真实服务
+
+用法:
+  python benchmark.py transport --records 5000 --latency-ms 80
+  python benchmark.py convert --records 100000
+  python benchmark.py parse --input test_output.txt
+  python benchmark.py memory --records 100000
+"""
+
+import argparse
+import ast
+import io
+import json
+import logging
+import re
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockBitableHandler(BaseHTTPRequestHandler):
+    """模拟多维表格开放接口，按路径后缀返回最小可用的响应"""
+
+    latency = 0.0
+    counter = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, data):
+        body = json.dumps({'code': 0, 'msg': 'success', 'data': data}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = self.path.split('?')[0]
+        if path.endswith('/fields'):
+            names = ['视频名称', 'aweme_id', 'desc', 'create_time', 'author_nickname', 'author_uid',
+                     'digg_count', 'comment_count', 'share_count', 'play_count', 'collect_count',
+                     'video_url', 'cover_url', 'duration', 'sync_time']
+            items = [{'field_id': f'fld{i}', 'field_name': name, 'type': 1} for i, name in enumerate(names)]
+            self._reply({'items': items, 'has_more': False, 'total': len(items)})
+        elif path.endswith('/records'):
+            self._reply({'items': [], 'has_more': False, 'total': 0})
+        elif re.search(r'/tables$', path):
+            self._reply({'items': [{'table_id': 'tblbench', 'name': '抖音视频数据'}], 'has_more': False})
+        else:
+            self._reply({})
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        records = []
+        for record in payload.get('records', []):
+            with MockBitableHandler.lock:
+                MockBitableHandler.counter += 1
+                record_id = record.get('record_id') or f'rec{MockBitableHandler.counter}'
+            records.append({'record_id': record_id, 'fields': record.get('fields', {})})
+        self._reply({'records': records})
+
+
+def start_mock_server(latency_ms: float) -> ThreadingHTTPServer:
+    """在后台线程启动模拟接口"""
+    MockBitableHandler.latency = latency_ms / 1000.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBitableHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def synthetic_videos(count: int, prefix: str = 'v'):
+    """生成合成视频数据"""
+    now = int(time.time())
+    return [
+        {
+            'aweme_id': f'{prefix}{i}',
+            'title': f'视频标题 {i}',
+            'author_name': '作者',
+            'author_uid': '10001',
+            'create_time': (now - i * 3600) * 1000,
+            'create_timestamp': now - i * 3600,
+            'digg_count': i * 7,
+            'comment_count': i * 3,
+            'share_count': i,
+            'play_count': i * 100,
+            'collect_count': i * 2,
+            'video_url': f'https://example.com/video/{i}.mp4',
+            'cover_url': f'https://example.com/cover/{i}.jpg',
+            'duration': 15000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def bench_transport(args):
+    """对比 baseopensdk 与 aiohttp 传输层的批量写入耗时"""
+    from feishu_writer import FeishuWriter, BaseConfig
+
+    server = start_mock_server(args.latency_ms)
+    domain = f'http://127.0.0.1:{server.server_address[1]}'
+    print(f"模拟接口: {domain}，单次请求延迟 {args.latency_ms}ms，记录数 {args.records}，"
+          f"每批 {args.batch_size} 条，并发 {args.max_in_flight}")
+
+    for transport in args.transports:
+        config = BaseConfig(app_token='bench', personal_base_token='bench', table_id='tblbench', domain=domain)
+        writer = FeishuWriter(
+            config,
+            max_in_flight=args.max_in_flight,
+            transport=transport,
+            rate_limits={
+                'app_table_record.batch_create': {'rate': 1000.0, 'max_rate': 1000.0}
+            }
+        )
+        writer.logger.setLevel(logging.WARNING)
+        videos = synthetic_videos(args.records, prefix=f'{transport}-')
+
+        start = time.perf_counter()
+        result = writer.batch_create_records(videos, args.batch_size)
+        elapsed = time.perf_counter() - start
+        writer.close()
+
+        print(f"{transport:>8}: {elapsed:.3f}s，成功 {result['success_count']} 条，"
+              f"{result['success_count'] / elapsed:.0f} 条/秒")
+
+    server.shutdown()
+
+
+def legacy_prepare_record_fields(writer, video_info):
+    """
+    转换计划之前的逐条转换实现，作为对比基准：
+    每条记录都重新读取字段缓存、构建完整的取值映射，并对每个字段执行 convert_value 和校验
+    """
+    from feishu_writer import DouyinDataTypeMapper
+
+    fields = {}
+    available_fields = writer.get_field_schema()
+
+    if '视频名称' in available_fields:
+        video_title = video_info.get('desc', '')
+        if not video_title:
+            video_title = f"抖音视频_{video_info.get('aweme_id', 'unknown')}"
+        fields['视频名称'] = video_title
+
+    field_mapping = {
+        'aweme_id': video_info.get('aweme_id', ''),
+        'desc': video_info.get('title', '') or video_info.get('desc', ''),
+        'create_time': video_info.get('create_time', 0),
+        'author_nickname': video_info.get('author_name', '') or video_info.get('author', {}).get('nickname', ''),
+        'author_uid': video_info.get('author_uid', '') or video_info.get('author', {}).get('uid', ''),
+        'digg_count': video_info.get('digg_count', 0) or video_info.get('statistics', {}).get('digg_count', 0),
+        'comment_count': video_info.get('comment_count', 0) or video_info.get('statistics', {}).get('comment_count', 0),
+        'collect_count': video_info.get('collect_count', 0) or video_info.get('statistics', {}).get('collect_count', 0),
+        'share_count': video_info.get('share_count', 0) or video_info.get('statistics', {}).get('share_count', 0),
+        'play_count': video_info.get('play_count', 0) or video_info.get('statistics', {}).get('play_count', 0),
+        'video_url': video_info.get('video_url', '') or writer._extract_video_url(video_info),
+        'cover_url': video_info.get('cover_url', '') or writer._extract_cover_url(video_info),
+        'duration': video_info.get('duration', 0) or video_info.get('video', {}).get('duration', 0),
+        'sync_time': int(time.time() * 1000)
+    }
+
+    for field_name, value in field_mapping.items():
+        if field_name in available_fields:
+            try:
+                converted_value = DouyinDataTypeMapper.convert_value(field_name, value)
+                if writer._validate_field_value(field_name, converted_value):
+                    fields[field_name] = converted_value
+                else:
+                    fields[field_name] = writer._get_default_value(field_name)
+            except Exception:
+                fields[field_name] = writer._get_default_value(field_name)
+
+    return fields
+
+
+def bench_convert(args):
+    """对比逐字段转换校验（基准）与预编译转换计划的吞吐量，并核对两者的输出一致"""
+    from feishu_writer import FeishuWriter, BaseConfig
+
+    server = start_mock_server(0)
+    domain = f'http://127.0.0.1:{server.server_address[1]}'
+    config = BaseConfig(app_token='bench', personal_base_token='bench', table_id='tblbench', domain=domain)
+    writer = FeishuWriter(config)
+    writer.logger.setLevel(logging.WARNING)
+    writer.get_field_schema()
+    videos = synthetic_videos(args.records)
+    print(f"记录数 {args.records}，表格字段 {len(writer.get_field_schema())} 个")
+
+    start = time.perf_counter()
+    legacy = [legacy_prepare_record_fields(writer, video) for video in videos]
+    baseline = time.perf_counter() - start
+    print(f"  基准（逐字段 convert_value + 校验）: {baseline:.3f}s，{args.records / baseline:.0f} 条/秒")
+
+    start = time.perf_counter()
+    for video in videos:
+        writer._prepare_record_fields(video)
+    elapsed = time.perf_counter() - start
+    print(f"  转换计划逐条转换: {elapsed:.3f}s，{args.records / elapsed:.0f} 条/秒，"
+          f"为基准的 {baseline / elapsed:.2f} 倍")
+
+    start = time.perf_counter()
+    planned = writer._prepare_records_fields(videos)
+    elapsed = time.perf_counter() - start
+    print(f"  转换计划批量转换: {elapsed:.3f}s，{args.records / elapsed:.0f} 条/秒，"
+          f"为基准的 {baseline / elapsed:.2f} 倍")
+
+    # 同步时间取自各自的调用时刻，不参与比较
+    mismatched = sum(
+        1 for old, new in zip(legacy, planned)
+        if {k: v for k, v in old.items() if k != 'sync_time'} != {k: v for k, v in new.items() if k != 'sync_time'}
+    )
+    print(f"  输出与基准不一致的记录: {mismatched} 条")
+
+    writer.close()
+    server.shutdown()
+
+
+# 旧版本抓取日志中完整响应的前缀，响应以Python字面量打印
+RESPONSE_DUMP_PREFIX = '[DEBUG] 完整响应: '
+
+
+def load_saved_responses(path: str):
+    """从抓取日志中读取保存的完整响应，转换回接口返回的JSON文本"""
+    pages = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith(RESPONSE_DUMP_PREFIX):
+                data = ast.literal_eval(line[len(RESPONSE_DUMP_PREFIX):])
+                pages.append(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+    return pages
+
+
+def bench_parse(args):
+    """对比视频列表响应的完整解码与选择性解码：每页耗时和峰值内存"""
+    from douyin_parser import has_streaming_backend, load_posts_response
+    from douyin_scraper import DouyinScraper
+
+    pages = load_saved_responses(args.input)
+    if not pages:
+        print(f"{args.input} 中没有找到保存的完整响应")
+        return
+
+    def parse_page(load, raw):
+        data = load(raw)
+        return [DouyinScraper.parse_video_info(video) for video in data['data']['aweme_list']]
+
+    methods = {'完整解码': json.loads, '选择性解码': load_posts_response}
+    if has_streaming_backend():
+        methods['流式解码(ijson)'] = lambda raw: load_posts_response(io.BytesIO(raw))
+
+    expected = [parse_page(json.loads, raw) for raw in pages]
+    page_kb = sum(len(raw) for raw in pages) / len(pages) / 1024
+    print(f"{len(pages)} 页响应，平均 {page_kb:.0f}KB/页，共 {sum(len(videos) for videos in expected)} 个视频，"
+          f"重复 {args.repeat} 次")
+
+    for name, load in methods.items():
+        if [parse_page(load, raw) for raw in pages] != expected:
+            print(f"  {name}: 解析结果与完整解码不一致")
+            continue
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for raw in pages:
+                parse_page(load, raw)
+            timings.append((time.perf_counter() - start) / len(pages))
+
+        peak = 0
+        for raw in pages:
+            tracemalloc.start()
+            parse_page(load, raw)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        print(f"  {name}: {min(timings) * 1000:.1f}ms/页，峰值内存 {peak / 1024 / 1024:.2f}MB/页")
+
+
+def bench_memory(args):
+    """对比视频信息和写入结果明细使用 dict 与紧凑类型时的内存占用"""
+    from feishu_writer import RecordDetail
+    from video_record import VideoRecord
+
+    def measure(build):
+        tracemalloc.start()
+        items = build()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del items
+        return current
+
+    cases = [
+        ('视频信息', lambda: synthetic_videos(args.records),
+         lambda: [VideoRecord.from_dict(video) for video in synthetic_videos(args.records)]),
+        ('结果明细', lambda: [{'aweme_id': f'v{i}', 'status': 'skipped', 'reason': '数据未变化'}
+                          for i in range(args.records)],
+         lambda: [RecordDetail(f'v{i}', 'skipped', '数据未变化') for i in range(args.records)]),
+    ]
+    print(f"记录数 {args.records}（含字段值本身占用的内存）")
+    for name, build_dicts, build_compact in cases:
+        before = measure(build_dicts)
+        after = measure(build_compact)
+        print(f"  {name}: dict {before / 1024 / 1024:.1f}MB ({before / args.records:.0f}B/条) -> "
+              f"{after / 1024 / 1024:.1f}MB ({after / args.records:.0f}B/条)，减少 {1 - after / before:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    transport_parser = subparsers.add_parser('transport', help='对比批量写入传输层')
+    transport_parser.add_argument('--records', type=int, default=5000)
+    transport_parser.add_argument('--batch-size', type=int, default=500)
+    transport_parser.add_argument('--max-in-flight', type=int, default=4)
+    transport_parser.add_argument('--latency-ms', type=float, default=80.0)
+    transport_parser.add_argument('--transports', nargs='+', default=['sdk', 'aiohttp'])
+    transport_parser.set_defaults(func=bench_transport)
+
+    convert_parser = subparsers.add_parser('convert', help='测量记录字段转换吞吐量')
+    convert_parser.add_argument('--records', type=int, default=100000)
+    convert_parser.set_defaults(func=bench_convert)
+
+    parse_parser = subparsers.add_parser('parse', help='对比视频列表响应的解码方式')
+    parse_parser.add_argument('--input', default='test_output.txt', help='包含完整响应的抓取日志')
+    parse_parser.add_argument('--repeat', type=int, default=20)
+    parse_parser.set_defaults(func=bench_parse)
+
+    memory_parser = subparsers.add_parser('memory', help='对比视频信息和结果明细的内存占用')
+    memory_parser.add_argument('--records', type=int, default=100000)
+    memory_parser.set_defaults(func=bench_memory)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
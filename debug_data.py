@@ -33,8 +33,8 @@ def analyze_single_video(url, max_videos=1):
     
     print(f"✅ 成功抓取到 {len(videos_data)} 条数据")
     
-    # 2. 分析第一条数据
-    video_data = videos_data[0]
+    # 2. 分析第一条数据（转换为字典以便打印和遍历）
+    video_data = videos_data[0].to_dict()
     print_json_pretty(video_data, "原始抖音数据结构")
     
     # 3. 分析数据字段
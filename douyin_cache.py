@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抖音接口分页响应的本地磁盘缓存
+以 (api_base_url, sec_user_id, max_cursor) 的哈希为文件名：同一cursor开始的页面不论当时请求多少条都可复用，
+每页请求数调整后重复运行仍能命中；超过有效期的条目视为未命中，总大小超过上限时按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class PageCache:
+    """分页响应磁盘缓存（线程安全）"""
+
+    def __init__(self, directory: str = '.douyin_cache', ttl: float = 3600.0,
+                 max_bytes: int = 200 * 1024 * 1024, refresh: bool = False):
+        """
+        ttl: 缓存有效期（秒）
+        max_bytes: 缓存目录总大小上限
+        refresh: 为 True 时不读取缓存，但仍写入最新响应
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(api_base_url: str, sec_user_id: str, max_cursor: int) -> str:
+        """缓存键：请求参数（不含每页请求数）的哈希"""
+        payload = json.dumps([api_base_url, sec_user_id, int(max_cursor)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, api_base_url: str, sec_user_id: str, max_cursor: int) -> Optional[Dict]:
+        """读取从 max_cursor 开始的未过期分页响应，返回的条目数取决于写入时的请求，未命中时返回None"""
+        if self.refresh:
+            self.misses += 1
+            return None
+
+        path = self._path(self.make_key(api_base_url, sec_user_id, max_cursor))
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            if time.time() - entry.get('created_at', 0) > self.ttl:
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            # 更新修改时间，作为LRU淘汰的依据
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry.get('data')
+
+    def put(self, api_base_url: str, sec_user_id: str, max_cursor: int, count: int, data: Dict):
+        """写入分页响应及其请求数，超过大小上限时淘汰最久未使用的条目"""
+        path = self._path(self.make_key(api_base_url, sec_user_id, max_cursor))
+        payload = json.dumps({'created_at': time.time(), 'count': count, 'data': data},
+                             ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+            total = self._get_total_bytes() + len(payload) - previous
+            self._total_bytes = total
+            if total > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """列出缓存文件: (修改时间, 大小, 路径)"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _get_total_bytes(self) -> int:
+        """缓存目录当前总大小，首次使用时扫描一次"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        return self._total_bytes
+
+    def _evict(self):
+        """按修改时间从旧到新删除，直到总大小回到上限的90%以下"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        self._total_bytes = total
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中次数"""
+        return {'hits': self.hits, 'misses': self.misses}
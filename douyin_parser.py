@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抖音视频列表响应的选择性解析
+每个 aweme_list 条目包含码率、音乐、图集等大量嵌套结构，parse_video_info 只用到其中十几个字段；
+这里在解码过程中就裁剪条目，只保留这些字段，返回结构与完整响应相同（字段更少）。
+- 标准库路径: 分块解码响应文本，逐个解码 aweme_list 条目并立即裁剪，
+  不生成整页的文本和对象树，同一时刻只有一个完整条目在内存中；
+  每个字节仍要经过 json 的C扫描器，耗时与整页 json.loads 相当（略慢），节省的是峰值内存
+- 流式路径: 安装了带C后端的 ijson 时，直接从响应流逐个事件解析，不需要先下载完整响应
+"""
+
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+try:
+    import ijson
+except ImportError:  # 可选依赖，未安装时使用标准库路径
+    ijson = None
+
+
+# parse_video_info 用到的字段；None 表示保留整个值，整数 n 表示列表只保留前 n 项
+AWEME_FIELDS = {
+    'aweme_id': None,
+    'desc': None,
+    'create_time': None,
+    'is_top': None,
+    'author': {'nickname': None, 'uid': None},
+    'statistics': {
+        'digg_count': None,
+        'comment_count': None,
+        'share_count': None,
+        'play_count': None,
+        'collect_count': None
+    },
+    'video': {
+        'duration': None,
+        'play_addr': {'url_list': 1},
+        'cover': {'url_list': 1}
+    }
+}
+
+# 分页需要的响应字段（aweme_list 之外）
+PAGE_FIELDS = ('code', 'message', 'data.has_more', 'data.max_cursor')
+
+AWEME_PREFIX = 'data.aweme_list.item'
+
+
+def _compile_selector(spec: Any) -> Optional[Callable[[Any], Any]]:
+    """把字段说明编译为裁剪函数，保留整个值的字段返回None，避免逐字段的函数调用"""
+    if spec is None:
+        return None
+    if isinstance(spec, int):
+        return lambda value: value[:spec] if isinstance(value, list) else value
+
+    fields = [(key, _compile_selector(sub_spec)) for key, sub_spec in spec.items()]
+
+    def select(value):
+        if not isinstance(value, dict):
+            return value
+        return {key: value[key] if selector is None else selector(value[key])
+                for key, selector in fields if key in value}
+    return select
+
+
+# 只保留 parse_video_info 用到的字段
+trim_aweme = _compile_selector(AWEME_FIELDS)
+
+
+def _trim_hook(obj: Dict) -> Dict:
+    # 嵌套对象先于外层解码，带 aweme_id 和 statistics 的对象即为视频条目
+    if 'aweme_id' in obj and 'statistics' in obj:
+        return trim_aweme(obj)
+    return obj
+
+
+_LIST_START = re.compile(rb'"aweme_list"\s*:\s*\[')
+_WHITESPACE = re.compile(r'\s*')
+# 每次解码的字节数，单个视频条目约60KB
+CHUNK_SIZE = 256 * 1024
+
+
+def _load_bytes(raw: bytes) -> Dict:
+    """分块解码 aweme_list 中的条目，列表外的少量内容整体解码"""
+    match = _LIST_START.search(raw)
+    if not match:
+        return json.loads(raw, object_hook=_trim_hook)
+
+    # 条目解码后整体裁剪一次，不为条目内的每个对象调用 object_hook
+    raw_decode = json.JSONDecoder().raw_decode
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    items = []
+    position = match.end()
+    buffer = ''
+    index = 0
+    # 缓冲区中至少保留已见最大条目的两倍长度，避免条目跨越分块边界而重复解码
+    reserve = 0
+    while True:
+        index = _WHITESPACE.match(buffer, index).end()
+        if index < len(buffer) and (len(buffer) - index >= reserve or position >= len(raw)):
+            char = buffer[index]
+            if char == ']':
+                break
+            if char == ',':
+                index += 1
+                continue
+            try:
+                start = index
+                item, index = raw_decode(buffer, index)
+                items.append(trim_aweme(item))
+                reserve = max(reserve, 2 * (index - start))
+                continue
+            except ValueError:
+                # 条目跨越了分块边界，读入下一块后重新解码
+                if position >= len(raw):
+                    raise
+        elif position >= len(raw):
+            raise ValueError("aweme_list 不完整")
+
+        end = min(position + max(CHUNK_SIZE, reserve), len(raw))
+        buffer = buffer[index:] + text_decoder.decode(raw[position:end], end >= len(raw))
+        index = 0
+        position = end
+
+    # 列表之后的内容：已解码未使用的文本 + 解码器中残留的字节 + 尚未解码的字节
+    pending = len(buffer[index + 1:].encode('utf-8')) + len(text_decoder.getstate()[0])
+    skeleton = json.loads(raw[:match.end() - 1] + b'null' + raw[position - pending:])
+    data = skeleton.get('data') if isinstance(skeleton, dict) else None
+    if not isinstance(data, dict) or 'aweme_list' not in data or data['aweme_list'] is not None:
+        # 匹配到的不是 data.aweme_list，退回整体解码
+        return json.loads(raw, object_hook=_trim_hook)
+    data['aweme_list'] = items
+    return skeleton
+
+
+def _leaf_paths(spec: Dict, prefix: str) -> Dict[str, tuple]:
+    """把字段说明展开为 ijson 事件前缀 -> 条目内的键路径"""
+    paths = {}
+    for key, sub_spec in spec.items():
+        path = f'{prefix}.{key}'
+        if isinstance(sub_spec, dict):
+            for sub_path, keys in _leaf_paths(sub_spec, path).items():
+                paths[sub_path] = (key,) + keys
+        elif isinstance(sub_spec, int):
+            paths[f'{path}.item'] = (key, sub_spec)
+        else:
+            paths[path] = (key,)
+    return paths
+
+
+_AWEME_LEAVES = _leaf_paths(AWEME_FIELDS, AWEME_PREFIX)
+_SCALAR_EVENTS = frozenset(('null', 'boolean', 'integer', 'double', 'number', 'string'))
+
+
+def _parse_events(events) -> Dict:
+    """从 ijson 事件流中构建裁剪后的响应"""
+    result = {}
+    data = None
+    aweme_list = None
+    item = None
+
+    for prefix, event, value in events:
+        keys = _AWEME_LEAVES.get(prefix)
+        if keys is not None:
+            if event not in _SCALAR_EVENTS:
+                continue
+            target = item
+            for key in keys[:-2]:
+                target = target.setdefault(key, {})
+            if isinstance(keys[-1], int):
+                # 列表字段只保留前 n 项
+                values = target.setdefault(keys[-2], [])
+                if len(values) < keys[-1]:
+                    values.append(value)
+            else:
+                if len(keys) > 1:
+                    target = target.setdefault(keys[-2], {})
+                target[keys[-1]] = value
+        elif prefix == AWEME_PREFIX:
+            if event == 'start_map':
+                item = {}
+            elif event == 'end_map':
+                aweme_list.append(item)
+                item = None
+        elif prefix == 'data.aweme_list':
+            if event == 'start_array':
+                aweme_list = data['aweme_list'] = []
+            elif event == 'null':
+                data['aweme_list'] = None
+        elif prefix == 'data':
+            if event == 'start_map':
+                data = result['data'] = {}
+            elif event == 'null':
+                result['data'] = None
+        elif prefix in PAGE_FIELDS and event in _SCALAR_EVENTS:
+            if prefix.startswith('data.'):
+                data[prefix[5:]] = value
+            else:
+                result[prefix] = value
+
+    return result
+
+
+def has_streaming_backend() -> bool:
+    """是否安装了带C后端的 ijson；纯Python后端比 json.loads 慢，不使用"""
+    return ijson is not None and getattr(ijson, 'backend', '') in ('yajl2_c', 'yajl2_cffi')
+
+
+def load_posts_response(source: Union[bytes, str, BinaryIO]) -> Dict:
+    """
+    解析视频列表接口的响应，aweme_list 中每个条目只保留 parse_video_info 用到的字段
+    source 为文件对象（如 requests 的 response.raw）且可以流式解析时逐块读取，否则整体解码
+    """
+    if isinstance(source, str):
+        return json.loads(source, object_hook=_trim_hook)
+    if isinstance(source, (bytes, bytearray)):
+        return _load_bytes(bytes(source))
+    if has_streaming_backend():
+        return _parse_events(ijson.parse(source, use_float=True))
+    return _load_bytes(source.read())
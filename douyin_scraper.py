@@ -1,28 +1,227 @@
 import requests
 import re
+import threading
 import time
-from typing import List, Dict, Optional
-from urllib.parse import urlparse, parse_qs
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, urljoin
+
+from douyin_parser import has_streaming_backend, load_posts_response
+from log_setup import PAYLOAD_LOGGER_NAME, setup_logging
+from video_record import VideoRecord
+
+
+logger = logging.getLogger('douyin_scraper')
+# 完整请求头/响应内容，默认关闭，见 log_setup.setup_logging(log_payloads=True)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+
+
+def format_timestamp_ms(timestamp_ms: Optional[int], fmt: str = '%Y-%m-%d %H:%M:%S') -> str:
+    """将毫秒时间戳格式化为本地时间字符串，仅用于展示"""
+    if not timestamp_ms:
+        return ''
+    return time.strftime(fmt, time.localtime(timestamp_ms / 1000))
+
+
+class PageSizeTuner:
+    """
+    按接口学习每页请求的视频数（count），减少大博主的翻页请求次数
+    请求数被整页返回且还有下一页时，下次加倍请求，直到某页返回数少于请求数（接口上限）或达到 MAX_PAGE_SIZE；
+    加大后的 count 拿不到数据时回退到上一个可用值，不再加大。学习结果按 api_base_url 保存在同步状态中
+    """
+    
+    DEFAULT_PAGE_SIZE = 40
+    MAX_PAGE_SIZE = 100
+    
+    def __init__(self, api_base_url: str, store=None):
+        """store: 可选的 sync_state.SyncStateStore，保存各接口学习到的每页视频数"""
+        self.api_base_url = api_base_url
+        self.store = store
+        # 下次请求的 count / 已确认接口能接受的最大 count / 不再加大的上限
+        self.page_size = self.DEFAULT_PAGE_SIZE
+        self.confirmed_size = 0
+        self.max_size = None
+        # 异步抓取器在线程池中调用 observe / reject（保存到SQLite时不阻塞事件循环）
+        self._lock = threading.Lock()
+        saved = store.get_page_size(api_base_url) if store is not None else None
+        if saved:
+            self.page_size = saved['page_size']
+            self.confirmed_size = saved['confirmed_size']
+            self.max_size = saved['max_size']
+    
+    def next_count(self, remaining: int) -> int:
+        """本页请求的视频数"""
+        return min(self.page_size, remaining)
+    
+    def observe(self, requested: int, returned: int, has_more: bool):
+        """
+        记录一页的请求数和接口返回的条目数（过滤前）
+        最后一页和因剩余数量不足而少请求的页不反映接口的每页上限，不参与学习
+        """
+        with self._lock:
+            if not has_more or requested < self.page_size:
+                return
+            
+            page_size, confirmed_size, max_size = self.page_size, max(self.confirmed_size, requested), self.max_size
+            if returned < requested:
+                # 接口每页返回的数量有上限，再加大 count 也不会减少请求次数
+                max_size = requested
+            elif max_size is None or requested < max_size:
+                page_size = min(requested * 2, max_size or self.MAX_PAGE_SIZE)
+            
+            if (page_size, confirmed_size, max_size) != (self.page_size, self.confirmed_size, self.max_size):
+                if page_size != self.page_size:
+                    logger.info("接口整页返回 %d 个视频，每页请求数调整为 %d", returned, page_size)
+                self.page_size, self.confirmed_size, self.max_size = page_size, confirmed_size, max_size
+                self._save()
+    
+    def reject(self, requested: int) -> bool:
+        """
+        接口正常返回、has_more 为1却没有条目时调用（请求失败时不调用，避免一次网络错误永久压低每页视频数）；
+        加大后的 count 未被接口接受则回退，返回是否应以新的 count 重试本页
+        """
+        with self._lock:
+            if requested <= max(self.confirmed_size, self.DEFAULT_PAGE_SIZE) or requested != self.page_size:
+                return False
+            fallback = self.confirmed_size or self.DEFAULT_PAGE_SIZE
+            logger.warning("接口未接受每页 %d 个视频，回退到 %d", requested, fallback)
+            self.page_size = self.max_size = fallback
+            self._save()
+            return True
+    
+    def _save(self):
+        if self.store is not None:
+            self.store.save_page_size(self.api_base_url, self.page_size, self.confirmed_size, self.max_size)
 
 
 class DouyinScraper:
-    def __init__(self, api_base_url: str = "https://douyin-api.xiaomiao.win"):
+    # 同步和异步抓取器共用的请求头
+    HEADERS = {
+        'accept': 'application/json, text/plain, */*',
+        'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'cache-control': 'no-cache',
+        'pragma': 'no-cache',
+        'referer': 'https://www.douyin.com/',
+        'sec-ch-ua': '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
+        'sec-ch-ua-mobile': '?0',
+        'sec-ch-ua-platform': '"Windows"',
+        'sec-fetch-dest': 'empty',
+        'sec-fetch-mode': 'cors',
+        'sec-fetch-site': 'same-origin',
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+    }
+    # 获取用户视频列表的接口路径
+    USER_POSTS_PATH = '/api/douyin/web/fetch_user_post_videos'
+    # 短链接解析：每次请求的超时时间（秒）、最多跟随的重定向次数、并发解析的线程数
+    RESOLVE_TIMEOUT = 10
+    MAX_REDIRECTS = 5
+    RESOLVE_WORKERS = 8
+    
+    def __init__(self, api_base_url: str = "https://douyin-api.xiaomiao.win", page_cache=None, link_cache=None,
+                 page_size_store=None):
         self.api_base_url = api_base_url
+        # 可选的分页响应磁盘缓存（douyin_cache.PageCache），有效期内重复抓取不再请求接口
+        self.page_cache = page_cache
+        # 可选的短链接解析结果存储（sync_state.SyncStateStore），短链接对应的sec_user_id不会变化
+        self.link_cache = link_cache
+        # 按接口学习每页请求的视频数，传入 page_size_store（SyncStateStore）时跨运行保存
+        self.page_sizes = PageSizeTuner(api_base_url, page_size_store)
+        # 实际发出的视频列表请求次数（不含缓存命中）
+        self.request_count = 0
+        self._resolved_links = {}
+        # 调用方未配置日志时使用默认的共享日志配置
+        setup_logging()
         self.session = requests.Session()
-        self.session.headers.update({
-            'accept': 'application/json, text/plain, */*',
-            'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'cache-control': 'no-cache',
-            'pragma': 'no-cache',
-            'referer': 'https://www.douyin.com/',
-            'sec-ch-ua': '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'empty',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-site': 'same-origin',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        })
+        self.session.headers.update(self.HEADERS)
+    
+    @staticmethod
+    def is_short_link(douyin_url: str) -> bool:
+        """是否为需要跟随重定向的短链接/分享链接"""
+        return 'v.douyin.com' in douyin_url or 'iesdouyin.com' in douyin_url
+    
+    @staticmethod
+    def match_sec_user_id(douyin_url: str) -> Optional[str]:
+        """从完整链接中匹配sec_user_id"""
+        patterns = [
+            r'sec_user_id=([^&]+)',
+            r'/user/([^/?]+)',
+            r'sec_uid=([^&]+)'
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, douyin_url)
+            if match:
+                return match.group(1)
+        return None
+    
+    @staticmethod
+    def build_request_params(sec_user_id: str, max_cursor: int, count: int, retry_count: int) -> Dict:
+        """按重试次数选择请求参数组合"""
+        params_variations = [
+            # 标准参数
+            {
+                'sec_user_id': sec_user_id,
+                'max_cursor': max_cursor,
+                'count': count
+            },
+            # 添加更多参数
+            {
+                'sec_user_id': sec_user_id,
+                'max_cursor': max_cursor,
+                'count': count,
+                'cut_version': '1',
+                'req_real_time': '1'
+            },
+            # 使用字符串格式的cursor
+            {
+                'sec_user_id': sec_user_id,
+                'max_cursor': str(max_cursor),
+                'count': count,
+                'publish_video_strategy_type': '2'
+            }
+        ]
+        
+        return params_variations[min(retry_count, len(params_variations) - 1)]
+    
+    @classmethod
+    def _match_redirect(cls, url: str) -> Optional[str]:
+        """从重定向中间地址匹配sec_user_id，短链接域名下只认查询参数里的sec_uid"""
+        if cls.is_short_link(url):
+            match = re.search(r'sec_(?:user_id|uid)=([^&]+)', url)
+            return match.group(1) if match else None
+        return cls.match_sec_user_id(url)
+    
+    def resolve_short_link(self, douyin_url: str) -> Optional[str]:
+        """
+        逐跳跟随短链接重定向，地址中一出现sec_user_id即停止，不再走完整个重定向链
+        """
+        url = douyin_url
+        for _ in range(self.MAX_REDIRECTS):
+            response = self.session.head(url, allow_redirects=False, timeout=self.RESOLVE_TIMEOUT)
+            location = response.headers.get('Location')
+            if not location:
+                break
+            url = urljoin(url, location)
+            sec_user_id = self._match_redirect(url)
+            if sec_user_id:
+                return sec_user_id
+        
+        sec_user_id = self.match_sec_user_id(url)
+        if not sec_user_id:
+            logger.warning("无法从URL中提取sec_user_id: %s", url)
+        return sec_user_id
+    
+    def resolve_sec_user_ids(self, douyin_urls: List[str], max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        并发解析一组链接的sec_user_id，已缓存的短链接不再请求
+        """
+        urls = list(dict.fromkeys(douyin_urls))
+        if not urls:
+            return {}
+        workers = max(1, min(max_workers or self.RESOLVE_WORKERS, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='resolve') as executor:
+            return dict(zip(urls, executor.map(self.extract_sec_user_id, urls)))
     
     def extract_sec_user_id(self, douyin_url: str) -> Optional[str]:
         """
@@ -30,85 +229,76 @@ class DouyinScraper:
         支持多种抖音链接格式
         """
         try:
-            # 如果是短链接，先获取重定向后的完整链接
-            if 'v.douyin.com' in douyin_url or 'iesdouyin.com' in douyin_url:
-                response = self.session.head(douyin_url, allow_redirects=True)
-                douyin_url = response.url
+            # 如果是短链接，优先使用已保存的解析结果，否则跟随重定向解析
+            if self.is_short_link(douyin_url):
+                sec_user_id = self._resolved_links.get(douyin_url)
+                if sec_user_id is None and self.link_cache is not None:
+                    sec_user_id = self.link_cache.get_short_link(douyin_url)
+                if sec_user_id is None:
+                    sec_user_id = self.resolve_short_link(douyin_url)
+                    if sec_user_id and self.link_cache is not None:
+                        self.link_cache.save_short_link(douyin_url, sec_user_id)
+                if sec_user_id:
+                    self._resolved_links[douyin_url] = sec_user_id
+                return sec_user_id
             
             # 从URL中提取sec_user_id
-            patterns = [
-                r'sec_user_id=([^&]+)',
-                r'/user/([^/?]+)',
-                r'sec_uid=([^&]+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, douyin_url)
-                if match:
-                    return match.group(1)
-            
-            print(f"无法从URL中提取sec_user_id: {douyin_url}")
+            sec_user_id = self.match_sec_user_id(douyin_url)
+            if sec_user_id:
+                return sec_user_id
+            
+            logger.warning("无法从URL中提取sec_user_id: %s", douyin_url)
             return None
             
         except Exception as e:
-            print(f"提取sec_user_id时出错: {e}")
+            logger.error("提取sec_user_id时出错: %s", e)
             return None
     
     def fetch_user_videos(self, sec_user_id: str, max_cursor: int = 0, count: int = 20, retry_count: int = 0) -> Dict:
         """
         获取用户的视频列表
         """
+        if self.page_cache is not None and retry_count == 0:
+            cached = self.page_cache.get(self.api_base_url, sec_user_id, max_cursor)
+            if cached is not None:
+                logger.debug("使用缓存的分页数据: max_cursor=%s", max_cursor)
+                return cached
+        
         try:
-            url = f"{self.api_base_url}/api/douyin/web/fetch_user_post_videos"
+            url = f"{self.api_base_url}{self.USER_POSTS_PATH}"
             
             # 尝试不同的参数组合
-            params_variations = [
-                # 标准参数
-                {
-                    'sec_user_id': sec_user_id,
-                    'max_cursor': max_cursor,
-                    'count': count
-                },
-                # 添加更多参数
-                {
-                    'sec_user_id': sec_user_id,
-                    'max_cursor': max_cursor,
-                    'count': count,
-                    'cut_version': '1',
-                    'req_real_time': '1'
-                },
-                # 使用字符串格式的cursor
-                {
-                    'sec_user_id': sec_user_id,
-                    'max_cursor': str(max_cursor),
-                    'count': count,
-                    'publish_video_strategy_type': '2'
-                }
-            ]
-            
-            params = params_variations[min(retry_count, len(params_variations) - 1)]
-            
-            print(f"[DEBUG] API请求参数 (尝试 {retry_count + 1}): {params}")
-            print(f"[DEBUG] 请求URL: {url}")
-            print(f"[DEBUG] 请求Headers: {dict(self.session.headers)}")
-            
-            response = self.session.get(url, params=params, timeout=30)
-            print(f"[DEBUG] HTTP状态码: {response.status_code}")
-            print(f"[DEBUG] 响应Headers: {dict(response.headers)}")
-            
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            print(f"[DEBUG] API响应状态码: {data.get('code')}")
-            print(f"[DEBUG] API响应消息: {data.get('message', 'N/A')}")
-            print(f"[DEBUG] 完整响应: {data}")
+            params = self.build_request_params(sec_user_id, max_cursor, count, retry_count)
+            
+            logger.debug("请求 %s (尝试 %d): %s", url, retry_count + 1, params)
+            payload_logger.debug("请求Headers: %s", self.session.headers)
+            
+            # 需要输出完整响应时才完整解码，否则解码时只保留用到的字段，有流式后端时边下载边解析
+            dump_payload = payload_logger.isEnabledFor(logging.DEBUG)
+            stream = has_streaming_backend() and not dump_payload
+            self.request_count += 1
+            with self.session.get(url, params=params, timeout=30, stream=stream) as response:
+                logger.debug("HTTP状态码: %s", response.status_code)
+                payload_logger.debug("响应Headers: %s", response.headers)
+                
+                response.raise_for_status()
+                
+                if dump_payload:
+                    data = response.json()
+                elif stream:
+                    response.raw.decode_content = True
+                    data = load_posts_response(response.raw)
+                else:
+                    data = load_posts_response(response.content)
+            
+            logger.debug("API响应: code=%s, message=%s", data.get('code'), data.get('message', 'N/A'))
+            payload_logger.debug("完整响应: %s", data)
             
             if data.get('code') != 200:
-                print(f"API返回错误: {data}")
+                logger.error("API返回错误: code=%s, message=%s", data.get('code'), data.get('message', ''))
                 # 如果是第一次尝试且失败，尝试其他参数组合
                 if retry_count < 2:
-                    print(f"尝试不同的参数组合...")
+                    logger.info("尝试不同的参数组合...")
                     time.sleep(3)  # 增加延迟
                     return self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
                 return {}
@@ -120,67 +310,148 @@ class DouyinScraper:
             has_more = result_data.get('has_more', 0)
             max_cursor_new = result_data.get('max_cursor', 0)
             
-            print(f"[DEBUG] 返回视频数量: {len(aweme_list)}")
-            print(f"[DEBUG] has_more: {has_more}")
-            print(f"[DEBUG] max_cursor: {max_cursor_new}")
-            print(f"[DEBUG] 完整响应数据键: {list(result_data.keys())}")
+            logger.debug("返回视频数量: %d, has_more: %s, max_cursor: %s", len(aweme_list), has_more, max_cursor_new)
             
             # 如果返回空数据但之前有数据，尝试重试
             if len(aweme_list) == 0 and max_cursor > 0 and retry_count < 2:
-                print(f"[WARNING] 返回空数据，尝试重试...")
+                logger.warning("返回空数据，尝试重试...")
                 time.sleep(5)  # 更长的延迟
                 return self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
             
+            if self.page_cache is not None and aweme_list:
+                self.page_cache.put(self.api_base_url, sec_user_id, max_cursor, count, result_data)
+            
             return result_data
             
         except Exception as e:
-            print(f"获取视频列表时出错: {e}")
+            logger.error("获取视频列表时出错: %s", e)
             # 重试机制
             if retry_count < 2:
-                print(f"网络错误，{3}秒后重试...")
+                logger.info("网络错误，3秒后重试...")
                 time.sleep(3)
                 return self.fetch_user_videos(sec_user_id, max_cursor, count, retry_count + 1)
             return {}
     
-    def fetch_all_videos(self, douyin_url: str, max_videos: int = 1000) -> List[Dict]:
+    @staticmethod
+    def newest_video_mark(videos: List[Dict], current: Optional[Dict] = None) -> Optional[Dict]:
+        """返回 videos 与 current 中发布时间最新的视频标记: create_timestamp / aweme_id"""
+        newest = current
+        for video in videos:
+            timestamp = int(video.get('create_timestamp') or 0)
+            if timestamp and (newest is None or timestamp > newest['create_timestamp']):
+                newest = {'create_timestamp': timestamp, 'aweme_id': video.get('aweme_id', '')}
+        return newest
+    
+    @staticmethod
+    def apply_high_water_mark(page_videos: List[Dict], high_water_mark: Optional[Dict]) -> Tuple[List[Dict], bool]:
+        """
+        按高水位过滤一页视频，返回 (比高水位新的视频, 本页是否已越过高水位)
+        置顶视频不按发布时间排列，只参与过滤，不作为停止翻页的依据
+        """
+        if not high_water_mark:
+            return page_videos, False
+        
+        new_videos = []
+        crossed = False
+        for video in page_videos:
+            timestamp = int(video.get('create_timestamp') or 0)
+            if video.get('aweme_id') == high_water_mark['aweme_id'] or timestamp < high_water_mark['create_timestamp']:
+                if not video.get('is_top'):
+                    crossed = True
+            else:
+                new_videos.append(video)
+        return new_videos, crossed
+    
+    def fetch_all_videos(self, douyin_url: str, max_videos: int = 1000,
+                         checkpoint_store=None, resume: bool = False,
+                         high_water_mark: Optional[Dict] = None, progress: Optional[Dict] = None) -> List[VideoRecord]:
         """
         获取用户的视频信息 - 使用分页逻辑，根据用户指定数量智能获取
+        传入 checkpoint_store（SyncStateStore.scrape_checkpoints 返回的目标表格断点）时每页抓取后保存断点，resume 为 True 时从断点继续
+        传入 high_water_mark 时只返回比它新的视频，翻到越过高水位的一页即停止
+        progress 见 iter_video_pages
+        """
+        all_videos = []
+        for page_videos in self.iter_video_pages(douyin_url, max_videos, checkpoint_store, resume,
+                                                 high_water_mark, progress):
+            all_videos.extend(page_videos)
+        
+        logger.info("总共获取到 %d 个视频", len(all_videos))
+        return all_videos
+    
+    def iter_video_pages(self, douyin_url: str, max_videos: int = 1000,
+                         checkpoint_store=None, resume: bool = False,
+                         high_water_mark: Optional[Dict] = None,
+                         progress: Optional[Dict] = None) -> Iterator[List[VideoRecord]]:
+        """
+        逐页获取用户的视频信息，每抓取并解析完一页就产出该页的视频列表
+        产出的视频总数不超过 max_videos
+        传入 progress 字典时，抓取结束后写入 progress['complete']：是否已越过高水位或翻到最后一页，
+        因数量上限、请求失败等提前停止，或从断点继续后没有抓取新页时为False，此时不能据此推进高水位
         """
+        if progress is not None:
+            progress['complete'] = False
         sec_user_id = self.extract_sec_user_id(douyin_url)
         if not sec_user_id:
-            return []
+            return
         
-        print(f"开始抓取用户视频，sec_user_id: {sec_user_id}")
-        print(f"目标获取视频数量: {max_videos}")
-        print(f"使用分页逻辑，每次最多获取40条...")
+        logger.info("开始抓取用户视频，sec_user_id: %s，目标数量: %d，每页请求 %d 条",
+                    sec_user_id, max_videos, self.page_sizes.page_size)
+        if high_water_mark:
+            logger.info("增量抓取: 只获取 %s 之后发布的视频",
+                        format_timestamp_ms(high_water_mark['create_timestamp'] * 1000))
         
-        all_videos = []
+        fetched_count = 0
         max_cursor = 0
         page_num = 1
+        has_more_pages = True
+        start_requests = self.request_count
+        start_time = time.monotonic()
+        complete = False
+        
+        if checkpoint_store is not None:
+            checkpoint = checkpoint_store.load_scrape_checkpoint(sec_user_id) if resume else None
+            if checkpoint:
+                saved_videos = [VideoRecord.from_dict(video) for video in checkpoint['videos'][:max_videos]]
+                max_cursor = checkpoint['max_cursor']
+                page_num = checkpoint['page_num']
+                has_more_pages = checkpoint['has_more']
+                logger.info("从断点继续: 已有 %d 个视频，第 %d 页，max_cursor: %s", len(saved_videos), page_num, max_cursor)
+                if saved_videos:
+                    fetched_count = len(saved_videos)
+                    yield saved_videos
+            else:
+                checkpoint_store.clear_scrape_checkpoint(sec_user_id)
         
-        while len(all_videos) < max_videos:
-            # 计算本次请求的数量，每次最多40条
-            remaining_videos = max_videos - len(all_videos)
-            count = min(40, remaining_videos)
+        while has_more_pages and fetched_count < max_videos:
+            # 计算本次请求的数量，不超过为该接口学习到的每页视频数
+            remaining_videos = max_videos - fetched_count
+            count = self.page_sizes.next_count(remaining_videos)
             
-            print(f"\n--- 第 {page_num} 页 ---")
-            print(f"当前已获取: {len(all_videos)} 个视频")
-            print(f"本次请求: {count} 个视频")
-            print(f"max_cursor: {max_cursor}")
+            logger.debug("第 %d 页: 已获取 %d 个视频，本次请求 %d 个，max_cursor: %s",
+                         page_num, fetched_count, count, max_cursor)
             
             # 获取当前页数据
+            requests_before = self.request_count
             data = self.fetch_user_videos(sec_user_id, max_cursor=max_cursor, count=count)
             
+            aweme_list = data.get('aweme_list', []) if data else []
+            # 只有接口正常返回、还有下一页却没有条目时才说明 count 未被接受；请求失败和最后一页不回退
+            if not aweme_list and data and data.get('has_more', 0) == 1 and self.page_sizes.reject(count):
+                continue
+            
             if not data:
-                print("API返回空数据，停止获取")
+                logger.info("API返回空数据，停止获取")
                 break
             
-            aweme_list = data.get('aweme_list', [])
             if not aweme_list:
-                print("没有获取到视频数据，停止获取")
+                logger.info("没有获取到视频数据，停止获取")
+                complete = data.get('has_more', 0) != 1
                 break
             
-            print(f"本页获取到 {len(aweme_list)} 个视频")
+            # 缓存的页面条目数取决于当时的请求数，只按接口实际返回的页面学习每页视频数
+            if self.request_count != requests_before:
+                self.page_sizes.observe(count, len(aweme_list), data.get('has_more', 0) == 1)
             
             # 处理当前页的视频信息
             page_videos = []
@@ -189,20 +460,41 @@ class DouyinScraper:
                 if video_info:
                     page_videos.append(video_info)
             
-            all_videos.extend(page_videos)
-            print(f"本页成功解析 {len(page_videos)} 个视频")
-            print(f"累计获取 {len(all_videos)} 个视频")
+            # 增量抓取时丢弃已同步过的视频
+            page_videos, reached_mark = self.apply_high_water_mark(page_videos, high_water_mark)
+            
+            # 确保不超过用户指定的数量
+            truncated = fetched_count + len(page_videos) > max_videos
+            if truncated:
+                page_videos = page_videos[:max_videos - fetched_count]
+                logger.debug("截取到指定数量: %d", max_videos)
+            
+            fetched_count += len(page_videos)
+            logger.info("第 %d 页: 解析 %d 个视频，累计 %d 个", page_num, len(page_videos), fetched_count)
             
             # 检查是否还有更多数据
             has_more = data.get('has_more', 0)
             new_max_cursor = data.get('max_cursor', 0)
+            logger.debug("has_more: %s, new_max_cursor: %s", has_more, new_max_cursor)
+            # 本页截断时被丢弃的视频还未同步，不算抓取完整
+            complete = (reached_mark or has_more != 1) and not truncated
             
-            print(f"has_more: {has_more}")
-            print(f"new_max_cursor: {new_max_cursor}")
+            # 保存断点，续跑时无需重新抓取本页
+            if checkpoint_store is not None:
+                checkpoint_store.save_scrape_page(
+                    sec_user_id, page_num, page_videos, new_max_cursor,
+                    has_more == 1 and new_max_cursor != max_cursor and not reached_mark
+                )
+            
+            yield page_videos
+            
+            if reached_mark:
+                logger.info("已到达上次同步的最新视频，停止获取")
+                break
             
             # 如果没有更多数据或者已经获取足够的视频，停止
             if has_more != 1 or new_max_cursor == max_cursor:
-                print("没有更多数据或cursor未更新，停止获取")
+                logger.info("没有更多数据或cursor未更新，停止获取")
                 break
             
             # 更新cursor准备下一页
@@ -210,25 +502,23 @@ class DouyinScraper:
             page_num += 1
             
             # 如果已经获取足够的视频，停止
-            if len(all_videos) >= max_videos:
-                print(f"已获取足够的视频数量: {len(all_videos)}")
+            if fetched_count >= max_videos:
+                logger.info("已获取足够的视频数量: %d", fetched_count)
                 break
             
             # 添加延迟避免请求过快
             time.sleep(1)
         
-        # 确保不超过用户指定的数量
-        if len(all_videos) > max_videos:
-            all_videos = all_videos[:max_videos]
-            print(f"截取到指定数量: {max_videos}")
-        
-        print(f"\n=== 最终结果 ===")
-        print(f"总共获取到 {len(all_videos)} 个视频")
-        return all_videos
+        logger.info("抓取结束: 请求接口 %d 次，获取 %d 个视频，耗时 %.1f 秒，每页请求 %d 条",
+                    self.request_count - start_requests, fetched_count,
+                    time.monotonic() - start_time, self.page_sizes.page_size)
+        if progress is not None:
+            progress['complete'] = complete
     
-    def parse_video_info(self, video_data: Dict) -> Dict:
+    @staticmethod
+    def parse_video_info(video_data: Dict) -> Optional[VideoRecord]:
         """
-        解析视频信息，提取需要的字段
+        解析视频信息，提取需要的字段，解析失败时返回None
         """
         try:
             # 获取视频基本信息
@@ -271,29 +561,27 @@ class DouyinScraper:
             if video:
                 duration = video.get('duration', 0)
             
-            # 转换时间戳为可读格式
-            create_time_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(create_time))
-            
-            return {
-                'aweme_id': aweme_id,
-                'title': desc,
-                'author_name': author_name,
-                'author_uid': author_uid,
-                'create_time': create_time_str,
-                'create_timestamp': create_time,
-                'digg_count': digg_count,
-                'comment_count': comment_count,
-                'share_count': share_count,
-                'play_count': play_count,
-                'collect_count': collect_count,
-                'video_url': video_url,
-                'cover_url': cover_url,
-                'duration': duration
-            }
+            return VideoRecord(
+                aweme_id=aweme_id,
+                title=desc,
+                author_name=author_name,
+                author_uid=author_uid,
+                create_time=int(create_time) * 1000 if create_time else 0,  # 毫秒时间戳
+                create_timestamp=create_time,
+                digg_count=digg_count,
+                comment_count=comment_count,
+                share_count=share_count,
+                play_count=play_count,
+                collect_count=collect_count,
+                video_url=video_url,
+                cover_url=cover_url,
+                duration=duration,
+                is_top=bool(video_data.get('is_top', 0))  # 置顶视频，不按发布时间排列
+            )
             
         except Exception as e:
-            print(f"解析视频信息时出错: {e}")
-            return {}
+            logger.warning("解析视频信息时出错: %s", e)
+            return None
 
 
 if __name__ == "__main__":
@@ -314,7 +602,7 @@ if __name__ == "__main__":
             print(f"ID: {video.get('aweme_id')}")
             print(f"标题: {video.get('title')}")
             print(f"作者: {video.get('author_name')}")
-            print(f"发布时间: {video.get('create_time')}")
+            print(f"发布时间: {format_timestamp_ms(video.get('create_time'))}")
             print(f"点赞数: {video.get('digg_count')}")
             print(f"评论数: {video.get('comment_count')}")
             
@@ -10,15 +10,63 @@ import sys
 import json
 import logging
 import hashlib
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable
 from dataclasses import dataclass
 import time
-import functools
+import threading
+import queue
+import asyncio
+from types import SimpleNamespace
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 
 from baseopensdk import BaseClient, JSON, LARK_DOMAIN, FEISHU_DOMAIN
 from baseopensdk.api.base.v1 import *
 
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，仅在使用 aiohttp 传输层时需要
+    aiohttp = None
+
+from rate_limiter import RateLimiterRegistry
+from retry_policy import RetryPolicy
+from log_setup import get_logger
+from sync_state import SyncStateStore, compute_stats_hash
+from video_record import VideoRecord
+
+
+class RecordDetail(Mapping):
+    """
+    写入结果中单条视频的处理情况，status: success / updated / skipped / failed
+    使用 __slots__ 代替每条一个字典，仍按原先的字典访问: detail['status'] / detail.get('reason') / dict(detail)；
+    与原先一样，没有原因时不包含 reason 键
+    """
+    
+    __slots__ = ('aweme_id', 'status', 'reason')
+    
+    def __init__(self, aweme_id: str, status: str, reason: Optional[str] = None):
+        self.aweme_id = aweme_id
+        self.status = status
+        self.reason = reason
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in ('aweme_id', 'status') or (key == 'reason' and self.reason is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(self.__slots__ if self.reason is not None else self.__slots__[:2])
+    
+    def __len__(self) -> int:
+        return 3 if self.reason is not None else 2
+    
+    def __repr__(self) -> str:
+        return f'RecordDetail({dict(self)!r})'
+
 
 class DataTypeMapper:
     """数据类型映射器"""
@@ -56,6 +104,15 @@ class BaseConfig:
     personal_base_token: str
     table_id: str
     region: str = 'domestic'  # 'domestic' for 国内飞书, 'overseas' for 海外Lark
+    domain: Optional[str] = None  # 自定义接口域名，为空时按region选择
+    # 为True时 table_id 指定的表格就是写入目标，准备表格时只补齐字段，不按表名查找或创建数据表
+    fixed_table: bool = False
+
+    def get_domain(self) -> str:
+        """获取接口域名"""
+        if self.domain:
+            return self.domain
+        return LARK_DOMAIN if self.region == 'overseas' else FEISHU_DOMAIN
 
 
 class DataTypeMapper:
@@ -133,6 +190,9 @@ class DouyinDataTypeMapper:
         if field_type == 'DateTime':
             if isinstance(value, datetime):
                 return int(value.timestamp() * 1000)  # 转换为毫秒时间戳
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                # 数值时间戳统一为毫秒
+                return int(value) if value > 1000000000000 else int(value * 1000)
             elif isinstance(value, str):
                 try:
                     # 尝试解析时间字符串
@@ -176,84 +236,442 @@ class DouyinDataTypeMapper:
             return str(value) if value is not None else ''
 
 
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0, backoff_factor: float = 2.0):
-    """改进的重试装饰器，支持指数退避和特定异常处理"""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    
-                    # 获取logger实例（如果存在）
-                    logger = None
-                    if args and hasattr(args[0], 'logger'):
-                        logger = args[0].logger
-                    
-                    if attempt < max_retries - 1:
-                        wait_time = delay * (backoff_factor ** attempt)
-                        if logger:
-                            logger.warning(f"第 {attempt + 1} 次尝试失败: {e}, {wait_time:.1f}秒后重试...")
-                        time.sleep(wait_time)
-                    else:
-                        if logger:
-                            logger.error(f"所有 {max_retries} 次尝试都失败了: {e}")
-                    continue
+def _stat_source(name: str) -> Callable[[Dict], Any]:
+    """统计字段取值：优先扁平字段，其次原始接口的 statistics 嵌套结构"""
+    def source(video_info: Dict) -> Any:
+        return video_info.get(name, 0) or video_info.get('statistics', {}).get(name, 0)
+    return source
+
+
+def _nested_url(video_info: Dict, key: str) -> str:
+    """从原始接口的 video.<key>.url_list 中取第一个地址"""
+    url_list = video_info.get('video', {}).get(key, {}).get('url_list', [])
+    return url_list[0] if url_list else ''
+
+
+class RecordConversionPlan:
+    """
+    记录转换计划
+    按当前表格字段预先编译 (目标字段, 取值函数, 转换函数) 列表，
+    批量转换时按顺序执行，不再逐字段查类型映射和重复校验
+    """
+    
+    TITLE_FIELD = '视频名称'
+    SYNC_TIME_FIELD = 'sync_time'
+    
+    # 表格字段 -> 从视频信息中取值的函数，兼容扁平结构和原始接口的嵌套结构
+    SOURCES = [
+        ('aweme_id', lambda v: v.get('aweme_id', '')),
+        ('desc', lambda v: v.get('title', '') or v.get('desc', '')),
+        ('create_time', lambda v: v.get('create_time', 0)),
+        ('author_nickname', lambda v: v.get('author_name', '') or v.get('author', {}).get('nickname', '')),
+        ('author_uid', lambda v: v.get('author_uid', '') or v.get('author', {}).get('uid', '')),
+        ('digg_count', _stat_source('digg_count')),
+        ('comment_count', _stat_source('comment_count')),
+        ('collect_count', _stat_source('collect_count')),
+        ('share_count', _stat_source('share_count')),
+        ('play_count', _stat_source('play_count')),
+        ('video_url', lambda v: v.get('video_url', '') or _nested_url(v, 'play_addr')),
+        ('cover_url', lambda v: v.get('cover_url', '') or _nested_url(v, 'cover')),
+        ('duration', lambda v: v.get('duration', 0) or v.get('video', {}).get('duration', 0)),
+    ]
+    
+    # 抓取器产出的 VideoRecord 直接按属性取值，不经过 get 和嵌套结构的兼容逻辑
+    RECORD_ATTRIBUTES = {
+        'aweme_id': 'aweme_id',
+        'desc': 'title',
+        'create_time': 'create_time',
+        'author_nickname': 'author_name',
+        'author_uid': 'author_uid',
+        'digg_count': 'digg_count',
+        'comment_count': 'comment_count',
+        'collect_count': 'collect_count',
+        'share_count': 'share_count',
+        'play_count': 'play_count',
+        'video_url': 'video_url',
+        'cover_url': 'cover_url',
+        'duration': 'duration',
+    }
+    
+    def __init__(self, available_fields: Iterable[str], coerce: Callable[[str, Any], Any]):
+        """
+        available_fields: 表格中存在的字段名
+        coerce: 慢路径，按字段类型完整转换并校验，失败时返回默认值
+        """
+        available = set(available_fields)
+        self.has_title = self.TITLE_FIELD in available
+        self.has_sync_time = self.SYNC_TIME_FIELD in available
+        self.steps = [
+            (name, source, self._compile_converter(name, coerce))
+            for name, source in self.SOURCES if name in available
+        ]
+        self.record_steps = [
+            (name, attrgetter(self.RECORD_ATTRIBUTES[name]), convert) for name, _, convert in self.steps
+        ]
+    
+    @staticmethod
+    def _compile_converter(field_name: str, coerce: Callable[[str, Any], Any]) -> Callable[[Any], Any]:
+        """按字段类型生成转换函数：类型已正确的值直接返回，其余交给慢路径"""
+        field_type = DouyinDataTypeMapper.get_field_type(field_name)
+        
+        if field_type in ('Text', 'Url'):
+            def convert(value):
+                return value if type(value) is str else coerce(field_name, value)
+        elif field_type == 'Number':
+            def convert(value):
+                return value if type(value) is int and value >= 0 else coerce(field_name, value)
+        elif field_type == 'DateTime':
+            def convert(value):
+                # 已是毫秒时间戳的直接使用
+                return value if type(value) is int and value > 1000000000000 else coerce(field_name, value)
+        else:
+            def convert(value):
+                return coerce(field_name, value)
+        return convert
+    
+    def convert(self, video_info: Dict, sync_time: Optional[int] = None) -> Dict:
+        """转换单条视频信息为飞书记录字段"""
+        fields = {}
+        if self.has_title:
+            fields[self.TITLE_FIELD] = video_info.get('desc', '') or f"抖音视频_{video_info.get('aweme_id', 'unknown')}"
+        steps = self.record_steps if type(video_info) is VideoRecord else self.steps
+        for name, source, convert in steps:
+            fields[name] = convert(source(video_info))
+        if self.has_sync_time:
+            fields[self.SYNC_TIME_FIELD] = sync_time if sync_time is not None else int(time.time() * 1000)
+        return fields
+    
+    def convert_batch(self, videos_info: List[Dict]) -> List[Dict]:
+        """批量转换，同一批记录使用相同的同步时间"""
+        sync_time = int(time.time() * 1000)
+        convert = self.convert
+        return [convert(video_info, sync_time) for video_info in videos_info]
+
+
+class AsyncBitableTransport:
+    """
+    基于aiohttp直接调用多维表格开放接口的传输层
+    请求体使用普通字典，所有请求在后台事件循环中通过同一个连接池发出
+    """
+    
+    def __init__(self, config: BaseConfig, max_connections: int = 4, timeout: float = 30.0):
+        if aiohttp is None:
+            raise ImportError("使用 aiohttp 传输层需要先安装 aiohttp: pip install aiohttp")
+        
+        self.config = config
+        self.base_url = f"{config.get_domain().rstrip('/')}/open-apis/bitable/v1/apps/{config.app_token}"
+        self.headers = {
+            'Authorization': f'Bearer {config.personal_base_token}',
+            'Content-Type': 'application/json; charset=utf-8'
+        }
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        
+        # 独立线程运行事件循环，同步代码通过 request 提交协程
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='bitable-transport', daemon=True)
+        self._thread.start()
+        self._session = self._submit(self._create_session())
+    
+    async def _create_session(self):
+        """创建复用连接的HTTP会话"""
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        return aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+    
+    def _submit(self, coroutine) -> Any:
+        """在后台事件循环中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    async def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Any:
+        """发送请求，返回与SDK响应属性一致的对象（code/msg/data/raw）"""
+        async with self._session.request(method, f"{self.base_url}{path}", json=payload) as response:
+            text = await response.text()
+            try:
+                body = json.loads(text, object_hook=lambda obj: SimpleNamespace(**obj))
+            except ValueError:
+                body = SimpleNamespace(code=-1, msg=text[:200], data=None)
+            return SimpleNamespace(
+                code=getattr(body, 'code', -1),
+                msg=getattr(body, 'msg', ''),
+                data=getattr(body, 'data', None),
+                raw=SimpleNamespace(status_code=response.status)
+            )
+    
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Any:
+        """同步调用接口，可在多个线程中并发使用"""
+        return self._submit(self._request(method, path, payload))
+    
+    def batch_create(self, table_id: str, records_fields: List[Dict], client_token: Optional[str] = None) -> Any:
+        """批量新增记录，client_token 相同的请求服务端只执行一次"""
+        payload = {'records': [{'fields': fields} for fields in records_fields]}
+        query = f'?client_token={client_token}' if client_token else ''
+        return self.request('POST', f'/tables/{table_id}/records/batch_create{query}', payload)
+    
+    def batch_update(self, table_id: str, updates: List[Tuple[str, Dict]]) -> Any:
+        """批量更新记录"""
+        payload = {'records': [{'record_id': record_id, 'fields': fields} for record_id, fields in updates]}
+        return self.request('POST', f'/tables/{table_id}/records/batch_update', payload)
+    
+    def close(self):
+        """关闭连接池并停止事件循环"""
+        if self._loop.is_closed():
+            return
+        self._submit(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class BaseClientEntry:
+    """同一租户的写入器共用的客户端、限流状态、字段缓存和aiohttp连接池"""
+    
+    def __init__(self, config: BaseConfig, client: Any, rate_limiters: RateLimiterRegistry):
+        self.config = config
+        self.client = client
+        self.rate_limiters = rate_limiters
+        self.last_used = time.monotonic()
+        # 正在使用该租户资源的写入器数量，由 BaseClientPool 在锁内维护；大于0时不会被淘汰
+        self.holders = 0
+        # 创建时使用的限速配置，之后获取同一租户时只用于比较
+        self.endpoint_limits = rate_limiters.endpoint_limits
+        self._schemas = {}
+        self._tables = {}
+        self._transport = None
+        self._lock = threading.Lock()
+    
+    def get_schema(self, table_id: str) -> Optional[Dict[str, Dict]]:
+        """读取已缓存的表格字段结构"""
+        with self._lock:
+            return self._schemas.get(table_id)
+    
+    def set_schema(self, table_id: str, schema: Optional[Dict[str, Dict]]):
+        """缓存表格字段结构，schema 为None时清除"""
+        with self._lock:
+            if schema is None:
+                self._schemas.pop(table_id, None)
+            else:
+                self._schemas[table_id] = schema
+    
+    def get_table_id(self, table_name: str) -> Optional[str]:
+        """读取已找到或创建的数据表ID"""
+        with self._lock:
+            return self._tables.get(table_name)
+    
+    def set_table_id(self, table_name: str, table_id: str):
+        """缓存数据表名称对应的ID"""
+        with self._lock:
+            self._tables[table_name] = table_id
+    
+    def get_transport(self, max_connections: int) -> AsyncBitableTransport:
+        """获取（必要时创建）该租户共用的aiohttp传输层"""
+        with self._lock:
+            if self._transport is None:
+                self._transport = AsyncBitableTransport(self.config, max_connections=max_connections)
+            return self._transport
+    
+    def close(self):
+        """释放传输层资源"""
+        with self._lock:
+            transport, self._transport = self._transport, None
+        if transport is not None:
+            transport.close()
+
+
+class BaseClientPool:
+    """
+    按 (app_token, personal_base_token, region) 复用 BaseClient 的LRU池
+    长时间运行的进程同步多个租户的表格时，同一租户的写入器共用连接、字段缓存和限流状态；
+    写入器通过 acquire / release 持有租户资源，只有没有写入器持有的租户才会被淘汰：
+    超过 max_size 时淘汰最久未使用的租户，释放后空闲超过 idle_timeout 秒的租户在下次获取时淘汰
+    """
+    
+    def __init__(self, max_size: int = 64, idle_timeout: float = 600.0):
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self._entries = OrderedDict()
+        self._table_locks = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(config: BaseConfig) -> Tuple:
+        """租户标识，自定义域名视为不同区域"""
+        return (config.app_token, config.personal_base_token, config.region, config.domain)
+    
+    def acquire(self, config: BaseConfig, endpoint_limits: Dict[str, Dict],
+                logger: logging.Logger) -> BaseClientEntry:
+        """
+        获取并持有租户的共用资源，首次获取时创建客户端，用完后调用 release
+        限速配置只在创建时生效，之后以不同的限速获取同一租户时记录警告
+        """
+        key = self._key(config)
+        evicted = []
+        with self._lock:
+            now = time.monotonic()
+            for stale_key in [k for k, entry in self._entries.items()
+                              if k != key and entry.holders == 0 and now - entry.last_used > self.idle_timeout]:
+                evicted.append(self._entries.pop(stale_key))
             
-            # 如果所有重试都失败，返回False而不是抛出异常
-            if 'create_record' in func.__name__ or 'check_record_exists' in func.__name__:
-                return False
-            raise last_exception
-        return wrapper
-    return decorator
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if endpoint_limits != entry.endpoint_limits:
+                    logger.warning(
+                        f"多维表格 {config.app_token} 已按其他限速配置连接，本次的限速配置不生效: {endpoint_limits}"
+                    )
+            else:
+                client = BaseClient.builder() \
+                    .app_token(config.app_token) \
+                    .personal_base_token(config.personal_base_token) \
+                    .domain(config.get_domain()) \
+                    .build()
+                rate_limiters = RateLimiterRegistry(endpoint_limits, logger=logger.getChild('rate_limiter'))
+                entry = BaseClientEntry(config, client, rate_limiters)
+                self._entries[key] = entry
+                # 从最久未使用的租户开始淘汰，仍被持有的跳过（此时池的大小可以暂时超过上限）
+                for stale_key in list(self._entries):
+                    if len(self._entries) <= self.max_size:
+                        break
+                    if stale_key != key and self._entries[stale_key].holders == 0:
+                        evicted.append(self._entries.pop(stale_key))
+                region_name = "海外Lark" if config.region == 'overseas' else "国内飞书"
+                logger.info(f"成功连接到{region_name}多维表格")
+            entry.holders += 1
+            entry.last_used = now
+        
+        for stale in evicted:
+            stale.close()
+        return entry
+    
+    def table_lock(self, app_token: str) -> threading.Lock:
+        """同一多维表格（app_token）的建表锁，不同租户凭证访问同一多维表格时也共用"""
+        with self._lock:
+            return self._table_locks.setdefault(app_token, threading.Lock())
+    
+    def release(self, entry: BaseClientEntry):
+        """写入器不再使用租户资源，空闲时间从此刻开始计算"""
+        with self._lock:
+            entry.holders = max(0, entry.holders - 1)
+            entry.last_used = time.monotonic()
+    
+    def close(self):
+        """释放所有租户的资源"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 进程内默认共用的客户端池
+default_client_pool = BaseClientPool()
 
 
 class FeishuWriter:
     """飞书多维表格写入器"""
     
-    def __init__(self, config: BaseConfig):
+    # 批量新增/更新接口单次请求允许的最大记录数
+    MAX_BATCH_SIZE = 500
+    # 列出记录接口单页允许的最大记录数
+    MAX_PAGE_SIZE = 500
+    # 写入的字段名在表格中不存在时返回的错误码
+    FIELD_NAME_NOT_FOUND_CODE = 1254045
+    # search 去重模式下单次筛选请求匹配的aweme_id数量
+    SEARCH_CHUNK_SIZE = 50
+    # 存在性检查方式: index 扫描全表建立本地索引，search 按批筛选本次涉及的aweme_id
+    DEDUP_MODES = ('index', 'search')
+    # 写入的数据表名称及其字段结构，建表和补齐字段时使用
+    TABLE_NAME = "抖音视频数据"
+    TABLE_SCHEMA = [
+        {'name': 'aweme_id', 'type': 'Text'},
+        {'name': 'desc', 'type': 'Text'},
+        {'name': 'create_time', 'type': 'DateTime'},
+        {'name': 'author_nickname', 'type': 'Text'},
+        {'name': 'author_uid', 'type': 'Text'},
+        {'name': 'digg_count', 'type': 'Number'},
+        {'name': 'comment_count', 'type': 'Number'},
+        {'name': 'collect_count', 'type': 'Number'},
+        {'name': 'share_count', 'type': 'Number'},
+        {'name': 'play_count', 'type': 'Number'},
+        {'name': 'video_url', 'type': 'Text'},
+        {'name': 'cover_url', 'type': 'Text'},
+        {'name': 'duration', 'type': 'Number'},
+        {'name': 'sync_time', 'type': 'DateTime'}
+    ]
+    # 会随时间变化、需要在upsert模式下刷新的统计字段
+    STATISTICS_FIELDS = ['digg_count', 'comment_count', 'share_count', 'play_count', 'collect_count']
+    # 各接口的初始限速（请求/秒），遇到限流时自动降速，成功后逐步提速到 max_rate
+    DEFAULT_RATE_LIMITS = {
+        'app_table_record.batch_create': {'rate': 5.0, 'max_rate': 10.0},
+        'app_table_record.batch_update': {'rate': 5.0, 'max_rate': 10.0},
+        'app_table_record.list': {'rate': 10.0, 'max_rate': 20.0},
+    }
+    
+    def __init__(self, config: BaseConfig, state_store: Optional[SyncStateStore] = None,
+                 rate_limits: Optional[Dict[str, Dict]] = None, max_in_flight: int = 1,
+                 transport: str = 'sdk', retry_policy: Optional[RetryPolicy] = None,
+                 dedup: str = 'index', client_pool: Optional[BaseClientPool] = None):
+        if dedup not in self.DEDUP_MODES:
+            raise ValueError(f"不支持的去重方式: {dedup}")
         self.config = config
         self.client = None
         self.data_mapper = DouyinDataTypeMapper()
+        # 可选的本地同步状态，用于跨运行跳过无变化的写入
+        self.state_store = state_store
+        self._known_state = None
+        # journal_key -> 已提交的aweme_id
+        self._committed = {}
+        self._table_ready = False
+        # 同时在途的批量写入请求数，大于1时并发发送各批次
+        self.max_in_flight = max(1, max_in_flight)
+        # 并发写入时保护记录索引和字段缓存
+        self._index_lock = threading.Lock()
+        self._schema_lock = threading.RLock()
+        # aweme_id -> record_id 索引，首次检查时通过一次全表扫描建立
+        self._record_index = None
+        self.dedup = dedup
+        # search 模式下已向表格查询过的aweme_id
+        self._searched_ids = set()
+        # aweme_id -> 表格中当前的统计字段值，用于upsert模式比较差异
+        self._record_stats = {}
+        # 表格字段结构缓存: 字段名 -> {'field_id', 'type'}，创建和更新路径共用
+        self._field_schema = None
+        self.schema_cache_hits = 0
+        self.schema_cache_misses = 0
+        # (字段缓存, 转换计划)，字段缓存对象变化时重新编译
+        self._conversion_plan = None
         
         # 先设置日志记录器
         self.logger = self._setup_logger()
         
-        # 连接飞书
-        if not self._connect_base():
+        # 区分可重试/永久错误的重试策略，带重试预算和熔断器
+        self.retry_policy = retry_policy or RetryPolicy(logger=self.logger.getChild('retry'))
+        
+        # 连接飞书，同一租户复用池中的客户端、限流器和字段缓存
+        self.client_pool = client_pool if client_pool is not None else default_client_pool
+        self.client_entry = None
+        self._released = False
+        if not self._connect_base(rate_limits):
             raise Exception("无法连接到飞书多维表格")
+        
+        # 可选的aiohttp传输层，用于批量写入；读取接口仍走SDK
+        self.rest_transport = None
+        if transport == 'aiohttp':
+            self.rest_transport = self.client_entry.get_transport(self.max_in_flight)
+            self.logger.info("批量写入使用 aiohttp 传输层")
+        elif transport != 'sdk':
+            self.close()
+            raise ValueError(f"不支持的传输层: {transport}")
     
     def _setup_logger(self) -> logging.Logger:
-        """设置日志记录器"""
-        logger = logging.getLogger('feishu_writer')
-        logger.setLevel(logging.INFO)
-        
-        # 避免重复添加处理器
-        if logger.handlers:
-            return logger
-        
-        # 创建控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        # 创建文件处理器
-        file_handler = logging.FileHandler('feishu_sync.log', encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
-        
-        # 设置日志格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(formatter)
-        file_handler.setFormatter(formatter)
-        
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-        
-        return logger
+        """获取共享日志配置下的记录器，调用方已配置日志时沿用其配置"""
+        return get_logger('feishu_writer')
     
     def create_base_table(self, table_name: str, schema: List[Dict]) -> Optional[str]:
         """在飞书多维表格中创建表"""
@@ -333,7 +751,7 @@ class FeishuWriter:
                 ) \
                 .build()
             
-            response = self.client.base.v1.app_table.create(request)
+            response = self._call_api('app_table.create', request)
             
             if response.success():
                 table_id = response.data.table_id
@@ -347,40 +765,87 @@ class FeishuWriter:
             self.logger.error(f"创建飞书表格 {table_name} 失败: {e}")
             return None
     
+    def create_field(self, field_name: str, field_type: str) -> Optional[Dict]:
+        """在当前表格中新增字段，返回 {'field_id', 'type'}"""
+        type_id = DataTypeMapper.get_field_type_code(field_type)
+        request = CreateAppTableFieldRequest.builder() \
+            .table_id(self.config.table_id) \
+            .request_body(
+                AppTableField.builder()
+                .field_name(field_name)
+                .type(type_id)
+                .build()
+            ) \
+            .build()
+        
+        response = self._call_api('app_table_field.create', request)
+        if response.code != 0:
+            self.logger.error(f"创建字段 {field_name} 失败: {response.msg}")
+            return None
+        
+        field = response.data.field
+        self.logger.info(f"成功创建字段: {field_name} ({field_type})")
+        return {'field_id': field.field_id, 'type': field.type}
+    
     def ensure_required_fields(self) -> bool:
-        """确保表格中存在所需的字段"""
+        """
+        对照 TABLE_SCHEMA 补齐当前表格缺少的字段，结果写入字段缓存
+        同一租户已缓存该表的字段结构时直接使用，不再请求字段接口；字段被删除后写入返回1254045时才重新加载
+        """
         try:
-            # 获取当前表格字段
-            table_fields = self.get_table_fields()
-            existing_fields = set()
-            
-            if hasattr(table_fields, 'items') and table_fields.items:
-                for field in table_fields.items:
-                    existing_fields.add(field.field_name)
-            elif isinstance(table_fields, dict) and 'items' in table_fields:
-                for field in table_fields['items']:
-                    field_name = field.get('field_name') if isinstance(field, dict) else field.field_name
-                    existing_fields.add(field_name)
-            
-            self.logger.info(f"现有字段: {existing_fields}")
-            
-            # 暂时跳过字段创建，使用现有字段
-            if '视频名称' in existing_fields:
-                self.logger.info("使用现有的'视频名称'字段进行测试")
-                return True
+            schema = self.client_entry.get_schema(self.config.table_id)
+            if schema is None:
+                self.schema_cache_misses += 1
+                schema = self._load_field_schema()
             else:
-                self.logger.error("表格中没有找到'视频名称'字段")
-                return False
+                self.schema_cache_hits += 1
+            missing = [col for col in self.TABLE_SCHEMA if col['name'] not in schema]
+            if not missing:
+                with self._schema_lock:
+                    self._field_schema = schema
+                    self.client_entry.set_schema(self.config.table_id, schema)
+                return True
+            
+            self.logger.info(f"现有字段 {len(schema)} 个，缺少字段: {[col['name'] for col in missing]}")
+            # 缓存的字段结构由同一租户的写入器共用，补齐字段时修改副本
+            schema = dict(schema)
+            for col in missing:
+                field = self.create_field(col['name'], col['type'])
+                if field is None:
+                    return False
+                schema[col['name']] = field
+            
+            with self._schema_lock:
+                self._field_schema = schema
+                self.client_entry.set_schema(self.config.table_id, schema)
+            return True
             
         except Exception as e:
             self.logger.error(f"确保字段存在时出错: {e}")
             return False
     
+    def provision_schema(self, table_name: str = TABLE_NAME) -> bool:
+        """
+        启动时一次性准备表格：确保数据表存在，补齐缺少的字段并缓存字段结构
+        config.fixed_table 为True时直接在 table_id 指定的表格上补齐字段
+        之后的写入不再访问数据表和字段接口
+        """
+        if self._table_ready:
+            return True
+        # 同一多维表格的建表和补字段串行进行，并发任务不会重复创建；之后的任务直接使用租户缓存
+        with self.client_pool.table_lock(self.config.app_token):
+            if not self.config.fixed_table and not self._ensure_table_exists(table_name):
+                return False
+            if not self.ensure_required_fields():
+                return False
+        self._table_ready = True
+        return True
+    
     def get_base_tables(self) -> Dict[str, str]:
         """获取飞书多维表格中的所有表"""
         try:
             request = ListAppTableRequest.builder().build()
-            response = self.client.base.v1.app_table.list(request)
+            response = self._call_api('app_table.list', request)
             
             if response.success():
                 tables = {}
@@ -395,42 +860,43 @@ class FeishuWriter:
             self.logger.error(f"获取飞书表格列表失败: {e}")
             return {}
     
-    def ensure_table_exists(self, table_name: str = "抖音视频数据") -> bool:
-        """确保表格存在，如果不存在则创建"""
+    def ensure_table_exists(self, table_name: str = TABLE_NAME) -> bool:
+        """确保表格存在，如果不存在则创建；同一多维表格的查找和创建串行进行，并发任务不会重复建表"""
+        with self.client_pool.table_lock(self.config.app_token):
+            return self._ensure_table_exists(table_name)
+    
+    def _use_table(self, table_name: str, table_id: str):
+        """切换到指定的数据表，并在租户资源上记录表名对应的ID"""
+        with self._schema_lock:
+            if self.config.table_id != table_id:
+                # 只清除本写入器的字段缓存，租户缓存按table_id区分，不影响其他表
+                self._field_schema = None
+            self.config.table_id = table_id
+        self.client_entry.set_table_id(table_name, table_id)
+    
+    def _ensure_table_exists(self, table_name: str) -> bool:
         try:
+            # 同一租户已找到或创建过该表时不再列出数据表
+            table_id = self.client_entry.get_table_id(table_name)
+            if table_id:
+                self._use_table(table_name, table_id)
+                return True
+            
             # 获取现有表格
             existing_tables = self.get_base_tables()
             
             if table_name in existing_tables:
                 # 表格已存在，更新table_id
-                self.config.table_id = existing_tables[table_name]
+                self._use_table(table_name, existing_tables[table_name])
                 self.logger.info(f"找到现有表格: {table_name} (ID: {self.config.table_id})")
                 return True
             else:
                 # 表格不存在，创建新表格
                 self.logger.info(f"表格 {table_name} 不存在，开始创建...")
                 
-                # 定义抖音视频数据的字段结构
-                schema = [
-                    {'name': 'aweme_id', 'type': 'Text'},
-                    {'name': 'desc', 'type': 'Text'},
-                    {'name': 'create_time', 'type': 'DateTime'},
-                    {'name': 'author_nickname', 'type': 'Text'},
-                    {'name': 'author_uid', 'type': 'Text'},
-                    {'name': 'digg_count', 'type': 'Number'},
-                    {'name': 'comment_count', 'type': 'Number'},
-                    {'name': 'collect_count', 'type': 'Number'},
-                    {'name': 'share_count', 'type': 'Number'},
-                    {'name': 'play_count', 'type': 'Number'},
-                    {'name': 'video_url', 'type': 'Text'},
-                    {'name': 'cover_url', 'type': 'Text'},
-                    {'name': 'duration', 'type': 'Number'},
-                    {'name': 'sync_time', 'type': 'DateTime'}
-                ]
-                
-                table_id = self.create_base_table(table_name, schema)
+                table_id = self.create_base_table(table_name, self.TABLE_SCHEMA)
                 if table_id:
-                    self.config.table_id = table_id
+                    self._use_table(table_name, table_id)
                     self.logger.info(f"成功创建表格: {table_name} (ID: {table_id})")
                     return True
                 else:
@@ -440,55 +906,43 @@ class FeishuWriter:
         except Exception as e:
             self.logger.error(f"确保表格存在失败: {e}")
             return False
-        
-        # 创建控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        # 创建文件处理器
-        file_handler = logging.FileHandler('feishu_sync.log', encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
-        
-        # 设置日志格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(formatter)
-        file_handler.setFormatter(formatter)
-        
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-        
-        return logger
     
-    def _connect_base(self) -> bool:
-        """连接飞书多维表格"""
+    def _connect_base(self, rate_limits: Optional[Dict[str, Dict]] = None) -> bool:
+        """从客户端池获取飞书多维表格连接"""
         try:
-            # 根据区域选择domain
-            domain = LARK_DOMAIN if self.config.region == 'overseas' else FEISHU_DOMAIN
-            
-            self.client = BaseClient.builder() \
-                .app_token(self.config.app_token) \
-                .personal_base_token(self.config.personal_base_token) \
-                .domain(domain) \
-                .build()
+            # 所有飞书接口调用共用的限流器，可按接口覆盖默认限速
+            endpoint_limits = dict(self.DEFAULT_RATE_LIMITS)
+            endpoint_limits.update(rate_limits or {})
             
-            region_name = "海外Lark" if self.config.region == 'overseas' else "国内飞书"
-            self.logger.info(f"成功连接到{region_name}多维表格")
+            self.client_entry = self.client_pool.acquire(self.config, endpoint_limits, self.logger)
+            self.client = self.client_entry.client
+            self.rate_limiters = self.client_entry.rate_limiters
             return True
         except Exception as e:
             self.logger.error(f"连接飞书多维表格失败: {e}")
             return False
     
-    @retry_on_failure(max_retries=3, delay=1.0)
-    def get_table_fields(self) -> Dict:
+    def _send(self, endpoint: str, func: Callable, *args) -> Any:
+        """按重试策略发出请求，每次尝试都经过限流器"""
+        return self.retry_policy.call(endpoint, self.rate_limiters.call, endpoint, func, *args)
+    
+    def _call_api(self, endpoint: str, request: Any) -> Any:
+        """经过重试策略和限流器调用飞书接口，endpoint 形如 'app_table_record.list'"""
+        resource, action = endpoint.split('.')
+        func = getattr(getattr(self.client.base.v1, resource), action)
+        return self._send(endpoint, func, request)
+    
+    def get_table_fields(self, page_token: Optional[str] = None) -> Dict:
         """获取表格的字段信息"""
         try:
-            request = ListAppTableFieldRequest.builder() \
+            builder = ListAppTableFieldRequest.builder() \
                 .table_id(self.config.table_id) \
-                .build()
+                .page_size(100)
+            if page_token:
+                builder.page_token(page_token)
+            request = builder.build()
             
-            response = self.client.base.v1.app_table_field.list(request)
+            response = self._call_api('app_table_field.list', request)
             
             if response.code == 0:
                 self.logger.debug("成功获取表格字段信息")
@@ -501,19 +955,72 @@ class FeishuWriter:
             self.logger.error(f"获取表格字段时出错: {e}")
             raise
     
-    @retry_on_failure(max_retries=3, delay=1.0)
-    def list_records(self, page_size: int = 20) -> Dict:
-        """列出表格中的记录"""
+    def _load_field_schema(self) -> Dict[str, Dict]:
+        """从接口分页读取表格字段，返回 字段名 -> {'field_id', 'type'}"""
+        schema = {}
+        page_token = None
+        
+        while True:
+            table_fields = self.get_table_fields(page_token=page_token)
+            if not table_fields:
+                raise Exception("获取表格字段失败")
+            
+            for field in table_fields.items or []:
+                schema[field.field_name] = {'field_id': field.field_id, 'type': field.type}
+            
+            page_token = table_fields.page_token
+            if not table_fields.has_more or not page_token:
+                break
+        
+        return schema
+    
+    def get_field_schema(self, refresh: bool = False) -> Dict[str, Dict]:
+        """获取表格字段结构，优先使用缓存"""
+        with self._schema_lock:
+            if self._field_schema is None and not refresh:
+                # 同一租户的其他写入器已加载过该表的字段结构
+                self._field_schema = self.client_entry.get_schema(self.config.table_id)
+            if self._field_schema is not None and not refresh:
+                self.schema_cache_hits += 1
+                return self._field_schema
+            
+            self.schema_cache_misses += 1
+            schema = self._load_field_schema()
+            self._field_schema = schema
+            self.client_entry.set_schema(self.config.table_id, schema)
+            self.logger.info(f"已缓存表格字段结构: {list(schema.keys())}")
+            return schema
+    
+    def invalidate_field_schema(self):
+        """表格结构变化后清空字段缓存，下次使用时重新加载"""
+        with self._schema_lock:
+            self._field_schema = None
+            self.client_entry.set_schema(self.config.table_id, None)
+    
+    @property
+    def schema_cache_stats(self) -> Dict[str, int]:
+        """字段缓存的命中/未命中次数"""
+        return {'hits': self.schema_cache_hits, 'misses': self.schema_cache_misses}
+    
+    def list_records(self, page_size: int = 20, page_token: Optional[str] = None,
+                     field_names: Optional[List[str]] = None, filter_formula: Optional[str] = None) -> Dict:
+        """列出表格中的一页记录，可按字段投影和筛选公式过滤"""
         try:
-            request = ListAppTableRecordRequest.builder() \
+            builder = ListAppTableRecordRequest.builder() \
                 .table_id(self.config.table_id) \
-                .page_size(page_size) \
-                .build()
+                .page_size(page_size)
+            if page_token:
+                builder.page_token(page_token)
+            if field_names:
+                builder.field_names(json.dumps(field_names, ensure_ascii=False))
+            if filter_formula:
+                builder.filter(filter_formula)
+            request = builder.build()
             
-            response = self.client.base.v1.app_table_record.list(request)
+            response = self._call_api('app_table_record.list', request)
             
             if response.code == 0:
-                self.logger.debug(f"成功获取 {len(response.data.items or [])} 条记录")
+                self.logger.debug("成功获取 %d 条记录", len(response.data.items or []))
                 return response.data
             else:
                 self.logger.error(f"获取记录失败: {response.msg}")
@@ -523,135 +1030,247 @@ class FeishuWriter:
             self.logger.error(f"获取记录时出错: {e}")
             raise
     
-    @retry_on_failure(max_retries=3, delay=1.0)
-    def check_record_exists(self, aweme_id: str) -> bool:
-        """检查记录是否已存在（基于aweme_id）"""
+    @staticmethod
+    def _field_text(value: Any) -> str:
+        """将文本字段的返回值（字符串或富文本片段列表）还原为纯文本"""
+        if isinstance(value, list):
+            return ''.join(
+                segment.get('text', '') if isinstance(segment, dict) else str(segment)
+                for segment in value
+            )
+        return str(value) if value is not None else ''
+    
+    @staticmethod
+    def _field_number(value: Any) -> int:
+        """将数字字段的返回值还原为整数，空值视为0"""
         try:
-            # 先获取所有记录，然后在本地检查是否存在相同的aweme_id
-            records_data = self.list_records(page_size=100)
-            
-            # 检查响应数据结构
-            if hasattr(records_data, 'items') and records_data.items:
-                items = records_data.items
-            elif isinstance(records_data, dict) and 'items' in records_data:
-                items = records_data['items']
-            else:
-                self.logger.debug("未找到记录数据")
-                return False
+            return int(value) if value is not None else 0
+        except (TypeError, ValueError):
+            return 0
+    
+    def build_record_index(self) -> Dict[str, str]:
+        """分页扫描整张表一次，建立 aweme_id -> record_id 索引"""
+        index = {}
+        stats = {}
+        page_token = None
+        page_num = 0
+        
+        # 只读取去重和比较差异所需的字段
+        schema = self.get_field_schema()
+        stat_fields = [name for name in self.STATISTICS_FIELDS if name in schema]
+        
+        while True:
+            records_data = self.list_records(
+                page_size=self.MAX_PAGE_SIZE,
+                page_token=page_token,
+                field_names=['aweme_id'] + stat_fields
+            )
+            if not records_data:
+                raise Exception("扫描表格记录失败，无法建立记录索引")
             
-            for item in items:
-                # 处理不同的数据结构
-                if hasattr(item, 'fields'):
-                    fields = item.fields
-                elif isinstance(item, dict) and 'fields' in item:
-                    fields = item['fields']
-                else:
-                    continue
-                
-                # 检查字段中是否有匹配的aweme_id
-                if hasattr(fields, 'get'):
-                    aweme_id_value = fields.get('aweme_id')
-                elif isinstance(fields, dict):
-                    aweme_id_value = fields.get('aweme_id')
-                else:
-                    continue
-                
-                if aweme_id_value == aweme_id:
-                    self.logger.debug(f"记录已存在: {aweme_id}")
-                    return True
+            page_num += 1
+            for item in records_data.items or []:
+                fields = item.fields or {}
+                aweme_id = self._field_text(fields.get('aweme_id'))
+                if aweme_id:
+                    index[aweme_id] = item.record_id
+                    stats[aweme_id] = {
+                        name: self._field_number(fields.get(name)) for name in stat_fields
+                    }
             
-            return False
+            page_token = records_data.page_token
+            if not records_data.has_more or not page_token:
+                break
+        
+        self._record_index = index
+        self._record_stats = stats
+        self.logger.info(f"记录索引建立完成: 扫描 {page_num} 页，共 {len(index)} 条记录")
+        
+        # 用表格中的实际数据刷新本地同步状态
+        self._persist_state([
+            (aweme_id, record_id, self._stats_hash(stats[aweme_id]))
+            for aweme_id, record_id in index.items()
+        ])
+        return index
+    
+    @staticmethod
+    def _build_id_filter(aweme_ids: List[str]) -> str:
+        """构造按aweme_id匹配的筛选公式: OR(CurrentValue.[aweme_id]="A",CurrentValue.[aweme_id]="B",...)"""
+        conditions = [
+            'CurrentValue.[aweme_id]="{}"'.format(aweme_id.replace('\\', '\\\\').replace('"', '\\"'))
+            for aweme_id in aweme_ids
+        ]
+        return conditions[0] if len(conditions) == 1 else f"OR({','.join(conditions)})"
+    
+    def search_records(self, aweme_ids: List[str]) -> Dict[str, Tuple[str, Dict[str, int]]]:
+        """一次筛选请求查找一组aweme_id，返回 aweme_id -> (record_id, 表格中的统计字段值)"""
+        schema = self.get_field_schema()
+        stat_fields = [name for name in self.STATISTICS_FIELDS if name in schema]
+        wanted = set(aweme_ids)
+        found = {}
+        page_token = None
+        
+        while True:
+            records_data = self.list_records(
+                page_size=self.MAX_PAGE_SIZE,
+                page_token=page_token,
+                field_names=['aweme_id'] + stat_fields,
+                filter_formula=self._build_id_filter(aweme_ids)
+            )
+            if not records_data:
+                raise Exception("按aweme_id筛选记录失败")
+            
+            for item in records_data.items or []:
+                fields = item.fields or {}
+                aweme_id = self._field_text(fields.get('aweme_id'))
+                if aweme_id in wanted:
+                    found[aweme_id] = (
+                        item.record_id,
+                        {name: self._field_number(fields.get(name)) for name in stat_fields}
+                    )
             
+            page_token = records_data.page_token
+            if not records_data.has_more or not page_token:
+                break
+        
+        return found
+    
+    def lookup_records(self, aweme_ids: List[str]):
+        """search模式：把尚未查询过的aweme_id分组筛选，结果并入记录索引"""
+        if self._record_index is None:
+            self._record_index = {}
+        unknown = list(dict.fromkeys(
+            aweme_id for aweme_id in aweme_ids
+            if aweme_id and aweme_id not in self._searched_ids and aweme_id not in self._record_index
+        ))
+        if not unknown:
+            return
+        
+        chunks = [unknown[start:start + self.SEARCH_CHUNK_SIZE]
+                  for start in range(0, len(unknown), self.SEARCH_CHUNK_SIZE)]
+        rows = []
+        for chunk, found in self._run_batches(self.search_records, chunks):
+            with self._index_lock:
+                for aweme_id, (record_id, stats) in found.items():
+                    self._record_index[aweme_id] = record_id
+                    self._record_stats[aweme_id] = stats
+                    rows.append((aweme_id, record_id, self._stats_hash(stats)))
+                self._searched_ids.update(chunk)
+        
+        self.logger.info(f"按aweme_id筛选 {len(unknown)} 条，共 {len(chunks)} 次请求，其中已存在 {len(rows)} 条")
+        self._persist_state(rows)
+    
+    def find_record_id(self, aweme_id: str) -> Optional[str]:
+        """根据aweme_id查找已存在记录的record_id"""
+        if self.dedup == 'search':
+            self.lookup_records([aweme_id])
+        elif self._record_index is None:
+            self.build_record_index()
+        return self._record_index.get(aweme_id)
+    
+    def check_record_exists(self, aweme_id: str) -> bool:
+        """检查记录是否已存在（基于aweme_id）"""
+        return self.find_record_id(aweme_id) is not None
+    
+    def _remember_record(self, aweme_id: str, record_id: str, video_info: Optional[Dict] = None):
+        """将新建或更新的记录加入索引"""
+        if self._record_index is not None and aweme_id and record_id:
+            with self._index_lock:
+                self._record_index[aweme_id] = record_id
+                if video_info is not None:
+                    self._record_stats[aweme_id] = self._extract_statistics(video_info)
+    
+    def _extract_statistics(self, video_info: Dict) -> Dict[str, int]:
+        """提取视频的统计字段值"""
+        statistics = video_info.get('statistics', {})
+        return {
+            name: DouyinDataTypeMapper.convert_value(name, video_info.get(name, 0) or statistics.get(name, 0))
+            for name in self.STATISTICS_FIELDS
+        }
+    
+    def _stats_hash(self, stats: Dict[str, int]) -> str:
+        """计算统计数据指纹，缺失的字段按0处理"""
+        return compute_stats_hash({name: stats.get(name, 0) for name in self.STATISTICS_FIELDS})
+    
+    def _persist_state(self, rows: List[Tuple[str, str, str]]):
+        """将 (aweme_id, record_id, stats_hash) 写入本地同步状态"""
+        if self.state_store is None or not rows:
+            return
+        if self._known_state is not None:
+            for aweme_id, record_id, stats_hash in rows:
+                self._known_state[aweme_id] = (record_id, stats_hash)
+        try:
+            self.state_store.upsert_records(self.config.app_token, self.config.table_id, rows)
         except Exception as e:
-            self.logger.error(f"检查记录存在性时出错: {e}")
-            return False  # 出错时返回False，允许继续创建记录
+            self.logger.warning(f"写入本地同步状态失败: {e}")
     
-    def _prepare_record_fields(self, video_info: Dict) -> Dict:
-        """准备记录字段数据"""
-        fields = {}
+    def _journal(self, journal_key: Optional[str], aweme_ids: List[str]):
+        """记录本批次已提交的aweme_id"""
+        if self.state_store is None or not journal_key or not aweme_ids:
+            return
+        self._committed.setdefault(journal_key, set()).update(aweme_ids)
+        try:
+            self.state_store.add_journal(self.config.app_token, self.config.table_id, journal_key, aweme_ids)
+        except Exception as e:
+            self.logger.warning(f"写入日志记录失败: {e}")
+    
+    def verify_sync_state(self) -> int:
+        """对照表格中的实际记录校验本地同步状态，清理在表格中已被删除的记录，返回清理条数"""
+        if self.state_store is None:
+            return 0
+        
+        known = self.state_store.get_records(self.config.app_token, self.config.table_id)
+        index = self.build_record_index()
+        stale = [aweme_id for aweme_id in known if aweme_id not in index]
+        self.state_store.delete_records(self.config.app_token, self.config.table_id, stale)
+        self._known_state = None
         
-        # 获取表格字段信息
+        self.logger.info(f"本地同步状态校验完成: 共 {len(known)} 条，清理失效记录 {len(stale)} 条")
+        return len(stale)
+    
+    def diff_statistics(self, aweme_id: str, video_info: Dict) -> Dict[str, int]:
+        """比较抓取到的统计值与表格中的值，只返回发生变化且表格中存在的字段"""
+        indexed = self._record_stats.get(aweme_id, {})
+        schema = self.get_field_schema()
+        return {
+            name: value
+            for name, value in self._extract_statistics(video_info).items()
+            if name in schema and indexed.get(name) != value
+        }
+    
+    def _get_conversion_plan(self) -> RecordConversionPlan:
+        """获取与当前字段缓存对应的转换计划，字段结构变化后重新编译"""
         try:
-            table_fields = self.get_table_fields()
-            available_fields = {}
-            if hasattr(table_fields, 'items') and table_fields.items:
-                for field in table_fields.items:
-                    available_fields[field.field_name] = field.field_id
-            elif isinstance(table_fields, dict) and 'items' in table_fields:
-                for field in table_fields['items']:
-                    field_name = field.get('field_name') if isinstance(field, dict) else field.field_name
-                    field_id = field.get('field_id') if isinstance(field, dict) else field.field_id
-                    available_fields[field_name] = field_id
-            
-            self.logger.debug(f"可用字段: {list(available_fields.keys())}")
-            
-            # 如果表格中没有足够的字段，尝试创建表格
-            if len(available_fields) <= 1:  # 只有默认的"视频名称"字段
-                self.logger.info("检测到表格字段不足，尝试确保表格存在...")
-                if self.ensure_table_exists():
-                    # 重新获取字段信息
-                    table_fields = self.get_table_fields()
-                    available_fields = {}
-                    if hasattr(table_fields, 'items') and table_fields.items:
-                        for field in table_fields.items:
-                            available_fields[field.field_name] = field.field_id
-                    elif isinstance(table_fields, dict) and 'items' in table_fields:
-                        for field in table_fields['items']:
-                            field_name = field.get('field_name') if isinstance(field, dict) else field.field_name
-                            field_id = field.get('field_id') if isinstance(field, dict) else field.field_id
-                            available_fields[field_name] = field_id
-                    self.logger.info(f"更新后的可用字段: {list(available_fields.keys())}")
-            
+            available_fields = self.get_field_schema()
         except Exception as e:
             self.logger.error(f"获取表格字段失败: {e}")
-            available_fields = {'视频名称': 'fld2ZQI3wS'}  # 使用默认字段
-        
-        # 根据可用字段准备数据
-        if '视频名称' in available_fields:
-            # 如果只有视频名称字段，将视频描述作为主要内容
-            video_title = video_info.get('desc', '')
-            if not video_title:
-                video_title = f"抖音视频_{video_info.get('aweme_id', 'unknown')}"
-            fields['视频名称'] = video_title
-        
-        # 如果有其他字段，按需添加
-        field_mapping = {
-            'aweme_id': video_info.get('aweme_id', ''),
-            'desc': video_info.get('title', '') or video_info.get('desc', ''),  # 优先使用title，fallback到desc
-            'create_time': video_info.get('create_time', ''),  # 保持原始字符串格式
-            'author_nickname': video_info.get('author_name', '') or video_info.get('author', {}).get('nickname', ''),
-            'author_uid': video_info.get('author_uid', '') or video_info.get('author', {}).get('uid', ''),
-            'digg_count': video_info.get('digg_count', 0) or video_info.get('statistics', {}).get('digg_count', 0),
-            'comment_count': video_info.get('comment_count', 0) or video_info.get('statistics', {}).get('comment_count', 0),
-            'collect_count': video_info.get('collect_count', 0) or video_info.get('statistics', {}).get('collect_count', 0),
-            'share_count': video_info.get('share_count', 0) or video_info.get('statistics', {}).get('share_count', 0),
-            'play_count': video_info.get('play_count', 0) or video_info.get('statistics', {}).get('play_count', 0),
-            'video_url': video_info.get('video_url', '') or self._extract_video_url(video_info),
-            'cover_url': video_info.get('cover_url', '') or self._extract_cover_url(video_info),
-            'duration': video_info.get('duration', 0) or video_info.get('video', {}).get('duration', 0),
-            'sync_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        # 只添加表格中存在的字段
-        for field_name, value in field_mapping.items():
-            if field_name in available_fields:
-                try:
-                    # 对于author_uid字段，确保正确获取值
-                    if field_name == 'author_uid' and not value:
-                        value = video_info.get('author_uid', '')
-                    
-                    converted_value = DouyinDataTypeMapper.convert_value(field_name, value)
-                    # 验证转换后的值
-                    if self._validate_field_value(field_name, converted_value):
-                        fields[field_name] = converted_value
-                    else:
-                        self.logger.warning(f"字段值验证失败: {field_name}={converted_value}, 使用默认值")
-                        fields[field_name] = self._get_default_value(field_name)
-                except Exception as e:
-                    self.logger.error(f"字段转换失败: {field_name}={value}, 错误: {e}")
-                    fields[field_name] = self._get_default_value(field_name)
+            available_fields = {'视频名称': {'field_id': 'fld2ZQI3wS', 'type': 1}}  # 使用默认字段
         
-        return fields
+        plan = self._conversion_plan
+        if plan is None or plan[0] is not available_fields:
+            plan = (available_fields, RecordConversionPlan(available_fields, self._coerce_field_value))
+            self._conversion_plan = plan
+        return plan[1]
+    
+    def _coerce_field_value(self, field_name: str, value: Any) -> Any:
+        """按字段类型转换并校验取值，失败时使用默认值"""
+        try:
+            converted_value = DouyinDataTypeMapper.convert_value(field_name, value)
+            # 验证转换后的值
+            if self._validate_field_value(field_name, converted_value):
+                return converted_value
+            self.logger.warning("字段值验证失败: %s=%s, 使用默认值", field_name, converted_value)
+        except Exception as e:
+            self.logger.error(f"字段转换失败: {field_name}={value}, 错误: {e}")
+        return self._get_default_value(field_name)
+    
+    def _prepare_record_fields(self, video_info: Dict) -> Dict:
+        """准备记录字段数据"""
+        return self._get_conversion_plan().convert(video_info)
+    
+    def _prepare_records_fields(self, videos_info: List[Dict]) -> List[Dict]:
+        """批量准备记录字段数据"""
+        return self._get_conversion_plan().convert_batch(videos_info)
     
     def _validate_field_value(self, field_name: str, value: Any) -> bool:
         """验证字段值是否符合类型要求"""
@@ -695,7 +1314,6 @@ class FeishuWriter:
         url_list = cover.get('url_list', [])
         return url_list[0] if url_list else ''
     
-    @retry_on_failure(max_retries=3, delay=1.0)
     def create_record(self, video_info: Dict) -> bool:
         """创建单条记录"""
         aweme_id = video_info.get('aweme_id', '')
@@ -705,7 +1323,7 @@ class FeishuWriter:
             fields = self._prepare_record_fields(video_info)
             
             # 调试输出字段信息
-            self.logger.debug(f"准备创建记录的字段: {fields}")
+            self.logger.debug("准备创建记录的字段: %s", fields)
             
             # 构建记录对象
             record = AppTableRecord.builder() \
@@ -717,10 +1335,12 @@ class FeishuWriter:
                 .request_body(record) \
                 .build()
             
-            response = self.client.base.v1.app_table_record.create(request)
+            response = self._call_api('app_table_record.create', request)
             
             if response.code == 0:
-                self.logger.debug(f"成功创建记录: {aweme_id}")
+                self.logger.debug("成功创建记录: %s", aweme_id)
+                if response.data and response.data.record:
+                    self._remember_record(aweme_id, response.data.record.record_id, video_info)
                 return True
             else:
                 self.logger.error(f"创建记录失败: {response.msg}, aweme_id: {aweme_id}")
@@ -731,126 +1351,392 @@ class FeishuWriter:
             self.logger.error(f"创建记录时出错: {e}, aweme_id: {aweme_id}")
             return False
     
-    def batch_create_records(self, videos_info: List[Dict], batch_size: int = 10) -> Dict:
-        """批量创建记录"""
-        result = {
-            'total': len(videos_info),
+    def _send_batch_create(self, records_fields: List[Dict], client_token: str) -> Any:
+        """
+        调用批量新增接口，一次请求写入多条记录
+        新增不是幂等操作：超时等错误时请求可能已经写入，重试时沿用同一个 client_token，由服务端去重
+        """
+        if self.rest_transport is not None:
+            return self._send(
+                'app_table_record.batch_create',
+                self.rest_transport.batch_create, self.config.table_id, records_fields, client_token
+            )
+        
+        records = [AppTableRecord.builder().fields(fields).build() for fields in records_fields]
+        
+        request = BatchCreateAppTableRecordRequest.builder() \
+            .table_id(self.config.table_id) \
+            .client_token(client_token) \
+            .request_body(
+                BatchCreateAppTableRecordRequestBody.builder()
+                .records(records)
+                .build()
+            ) \
+            .build()
+        
+        return self._call_api('app_table_record.batch_create', request)
+    
+    def create_records_batch(self, videos_info: List[Dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """批量创建一组记录，按输入顺序返回每条记录的 (record_id, 失败原因)"""
+        records_fields = self._prepare_records_fields(videos_info)
+        
+        try:
+            # 每批一个幂等标识，重试策略重发时沿用
+            response = self._send_batch_create(records_fields, str(uuid.uuid4()))
+            if response.code == self.FIELD_NAME_NOT_FOUND_CODE:
+                # 表格字段已被修改，刷新字段缓存后重试一次；请求内容已变化，使用新的幂等标识
+                self.logger.warning(f"字段不存在，刷新字段缓存后重试: {response.msg}")
+                self.invalidate_field_schema()
+                records_fields = self._prepare_records_fields(videos_info)
+                response = self._send_batch_create(records_fields, str(uuid.uuid4()))
+        except Exception as e:
+            self.logger.error(f"批量创建记录时出错: {e}")
+            return [(None, str(e))] * len(videos_info)
+        
+        if response.code != 0:
+            self.logger.error(f"批量创建记录失败: {response.msg}")
+            return [(None, f"批量创建失败: {response.msg}")] * len(videos_info)
+        
+        created = (response.data.records if response.data else None) or []
+        outcomes = []
+        for index, video_info in enumerate(videos_info):
+            record_id = created[index].record_id if index < len(created) else None
+            if record_id:
+                self._remember_record(video_info.get('aweme_id', ''), record_id, video_info)
+                outcomes.append((record_id, None))
+            else:
+                outcomes.append((None, '批量响应中缺少该记录'))
+        return outcomes
+    
+    def _send_batch_update(self, updates: List[Tuple[str, Dict]]) -> Any:
+        """调用批量更新接口，一次请求更新多条记录"""
+        if self.rest_transport is not None:
+            return self._send(
+                'app_table_record.batch_update',
+                self.rest_transport.batch_update, self.config.table_id, updates
+            )
+        
+        records = [
+            AppTableRecord.builder().record_id(record_id).fields(fields).build()
+            for record_id, fields in updates
+        ]
+        
+        request = BatchUpdateAppTableRecordRequest.builder() \
+            .table_id(self.config.table_id) \
+            .request_body(
+                BatchUpdateAppTableRecordRequestBody.builder()
+                .records(records)
+                .build()
+            ) \
+            .build()
+        
+        return self._call_api('app_table_record.batch_update', request)
+    
+    def update_records_batch(self, updates: List[Tuple[str, Dict]]) -> List[Optional[str]]:
+        """批量更新一组记录，按输入顺序返回每条记录的失败原因（成功为None）"""
+        try:
+            response = self._send_batch_update(updates)
+        except Exception as e:
+            self.logger.error(f"批量更新记录时出错: {e}")
+            return [str(e)] * len(updates)
+        
+        if response.code != 0:
+            self.logger.error(f"批量更新记录失败: {response.msg}")
+            return [f"批量更新失败: {response.msg}"] * len(updates)
+        
+        return [None] * len(updates)
+    
+    def _run_batches(self, func, chunks: List[List]):
+        """依次或并发执行各批次请求，按提交顺序产出 (批次, 结果)"""
+        if self.max_in_flight <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield chunk, func(chunk)
+            return
+        
+        workers = min(self.max_in_flight, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='feishu-writer') as executor:
+            for chunk, outcome in zip(chunks, executor.map(func, chunks)):
+                yield chunk, outcome
+    
+    @staticmethod
+    def _new_result() -> Dict:
+        """创建空的写入结果统计"""
+        return {
+            'total': 0,
             'success_count': 0,
+            'updated_count': 0,
             'failed_count': 0,
             'skipped_count': 0,
             'details': []
         }
+    
+    def batch_create_records(self, videos_info: List[Dict], batch_size: int = MAX_BATCH_SIZE,
+                             upsert: bool = False, journal_key: Optional[str] = None) -> Dict:
+        """
+        批量创建记录，每次请求最多写入 batch_size 条
+        upsert 为 True 时，已存在记录中统计值发生变化的字段会通过批量更新接口刷新
+        journal_key 不为空时，每批提交后记录写入日志，续跑时跳过日志中已提交的视频
+        """
+        result = self._new_result()
+        self._write_videos(videos_info, result, batch_size, upsert, journal_key)
+        self._log_result(result)
+        return result
+    
+    def sync_stream(self, pages: Iterable[List[Dict]], batch_size: int = MAX_BATCH_SIZE,
+                    upsert: bool = False, journal_key: Optional[str] = None, queue_size: int = 4) -> Dict:
+        """
+        边抓取边写入：后台线程消费分页生成器放入有界队列，当前线程逐批写入
+        写入较慢时会把队列中已积压的多页合并成一次写入
+        """
+        result = self._new_result()
+        page_queue = queue.Queue(maxsize=max(1, queue_size))
+        end_of_stream = object()
+        producer_error = []
+        
+        def produce():
+            try:
+                for page_videos in pages:
+                    page_queue.put(page_videos)
+            except BaseException as e:
+                producer_error.append(e)
+            finally:
+                page_queue.put(end_of_stream)
         
-        # 首先确保表格存在
-        if not self.ensure_table_exists():
-            self.logger.error("确保表格存在失败，无法继续写入记录")
-            result['failed_count'] = result['total']
-            return result
+        producer = threading.Thread(target=produce, name='page-producer', daemon=True)
+        producer.start()
         
-        self.logger.info(f"开始批量写入 {len(videos_info)} 条记录到飞书多维表格...")
+        finished = False
+        while not finished:
+            videos_info = []
+            item = page_queue.get()
+            while True:
+                if item is end_of_stream:
+                    finished = True
+                    break
+                videos_info.extend(item)
+                try:
+                    item = page_queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if videos_info:
+                self._write_videos(videos_info, result, batch_size, upsert, journal_key)
+        
+        producer.join()
+        self._log_result(result)
+        if producer_error:
+            raise producer_error[0]
+        return result
+    
+    def _get_known_state(self) -> Dict[str, Tuple[str, str]]:
+        """本地同步状态在首次使用时整表读入内存"""
+        if self._known_state is None:
+            self._known_state = self.state_store.get_records(self.config.app_token, self.config.table_id)
+        return self._known_state
+    
+    def _write_videos(self, videos_info: List[Dict], result: Dict, batch_size: int,
+                      upsert: bool, journal_key: Optional[str]):
+        """过滤、创建并更新一组视频记录，结果累加到 result"""
+        result['total'] += len(videos_info)
+        if not videos_info:
+            return
+        
+        # 上次中断前已提交的视频直接跳过
+        if self.state_store is not None and journal_key:
+            if journal_key not in self._committed:
+                self._committed[journal_key] = self.state_store.get_journal(
+                    self.config.app_token, self.config.table_id, journal_key
+                )
+            committed = self._committed[journal_key]
+            if committed:
+                remaining = []
+                for video_info in videos_info:
+                    if video_info.get('aweme_id', '') in committed:
+                        result['skipped_count'] += 1
+                        result['details'].append(RecordDetail(video_info.get('aweme_id', ''), 'skipped', '上次运行已提交'))
+                    else:
+                        remaining.append(video_info)
+                self.logger.info(f"写入日志中已提交 {len(videos_info) - len(remaining)} 条，跳过")
+                videos_info = remaining
+        
+        # 本地同步状态中已有且统计数据未变化的视频直接跳过，无需访问飞书
+        if self.state_store is not None:
+            known = self._get_known_state()
+            candidates = []
+            for video_info in videos_info:
+                state = known.get(video_info.get('aweme_id', ''))
+                if state and (not upsert or state[1] == self._stats_hash(self._extract_statistics(video_info))):
+                    result['skipped_count'] += 1
+                    result['details'].append(RecordDetail(video_info.get('aweme_id', ''), 'skipped', '本地同步状态显示无变化'))
+                else:
+                    candidates.append(video_info)
+            
+            self.logger.info(f"本地同步状态命中 {len(videos_info) - len(candidates)} 条，剩余 {len(candidates)} 条需要处理")
+            videos_info = candidates
+            if not videos_info:
+                return
+        
+        # 未在启动时准备表格的写入器，在第一次写入前准备一次
+        if not self._table_ready and not self.provision_schema():
+            self.logger.error("准备表格和字段失败，无法继续写入记录")
+            result['failed_count'] += len(videos_info)
+            return
+        
+        # index 模式扫描一次全表建立索引；search 模式只按批筛选本次涉及的aweme_id
+        if self.dedup == 'search' or self._record_index is None:
+            try:
+                if self.dedup == 'search':
+                    self.lookup_records([video_info.get('aweme_id', '') for video_info in videos_info])
+                else:
+                    self.build_record_index()
+            except Exception as e:
+                self.logger.error(f"建立记录索引失败，无法安全去重: {e}")
+                result['failed_count'] += len(videos_info)
+                return
         
+        batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+        self.logger.info(f"开始批量写入 {len(videos_info)} 条记录到飞书多维表格，每批 {batch_size} 条...")
+        
+        # 先过滤已存在的记录（以及本次输入中的重复项），收集待创建和待更新的记录
+        pending = []
+        pending_updates = []
+        unchanged_state = []
+        seen_ids = set()
         for i, video_info in enumerate(videos_info, 1):
             aweme_id = video_info.get('aweme_id', f'unknown_{i}')
+            record_id = None if aweme_id in seen_ids else self.find_record_id(aweme_id)
+            
+            if aweme_id not in seen_ids and record_id is None:
+                seen_ids.add(aweme_id)
+                pending.append((aweme_id, video_info))
+                continue
+            
+            changed_fields = self.diff_statistics(aweme_id, video_info) if upsert and record_id else {}
+            if changed_fields:
+                seen_ids.add(aweme_id)
+                pending_updates.append((aweme_id, record_id, changed_fields, video_info))
+                continue
             
+            if upsert and record_id:
+                unchanged_state.append((aweme_id, record_id, self._stats_hash(self._extract_statistics(video_info))))
+            
+            result['skipped_count'] += 1
+            result['details'].append(RecordDetail(aweme_id, 'skipped', '数据未变化' if upsert and record_id else '记录已存在'))
+            self.logger.debug("记录已存在，跳过: %s", aweme_id)
+        
+        self._persist_state(unchanged_state)
+        
+        def create_chunk(chunk):
             try:
-                self.logger.info(f"处理第 {i}/{len(videos_info)} 条记录: {aweme_id}")
-                
-                # 检查记录是否已存在
-                try:
-                    if self.check_record_exists(aweme_id):
-                        result['skipped_count'] += 1
-                        result['details'].append({
-                            'aweme_id': aweme_id,
-                            'status': 'skipped',
-                            'reason': '记录已存在'
-                        })
-                        self.logger.info(f"记录已存在，跳过: {aweme_id}")
-                        continue
-                except Exception as check_error:
-                    self.logger.warning(f"检查记录存在性失败，继续创建: {check_error}")
-                
-                # 创建记录
-                try:
-                    if self.create_record(video_info):
-                        result['success_count'] += 1
-                        result['details'].append({
-                            'aweme_id': aweme_id,
-                            'status': 'success'
-                        })
-                        self.logger.info(f"成功创建记录: {aweme_id}")
-                    else:
-                        result['failed_count'] += 1
-                        result['details'].append({
-                            'aweme_id': aweme_id,
-                            'status': 'failed',
-                            'reason': '创建失败'
-                        })
-                        self.logger.error(f"创建记录失败: {aweme_id}")
-                except Exception as create_error:
+                return self.create_records_batch([video_info for _, video_info in chunk])
+            except Exception as e:
+                self.logger.error(f"处理批次时出错: {e}")
+                return [(None, str(e))] * len(chunk)
+        
+        # 按批次调用批量新增接口，最多 max_in_flight 个请求同时在途
+        create_chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        if create_chunks:
+            self.logger.info(f"共 {len(pending)} 条待创建记录，分 {len(create_chunks)} 批写入，并发数 {self.max_in_flight}")
+        for chunk, outcomes in self._run_batches(create_chunk, create_chunks):
+            self._persist_state([
+                (aweme_id, record_id, self._stats_hash(self._extract_statistics(video_info)))
+                for (aweme_id, video_info), (record_id, _) in zip(chunk, outcomes) if record_id
+            ])
+            self._journal(journal_key, [
+                aweme_id for (aweme_id, _), (record_id, _) in zip(chunk, outcomes) if record_id
+            ])
+            
+            for (aweme_id, _), (record_id, reason) in zip(chunk, outcomes):
+                if record_id:
+                    result['success_count'] += 1
+                    result['details'].append(RecordDetail(aweme_id, 'success'))
+                else:
                     result['failed_count'] += 1
-                    result['details'].append({
-                        'aweme_id': aweme_id,
-                        'status': 'error',
-                        'reason': str(create_error)
-                    })
-                    self.logger.error(f"创建记录时出错: {create_error}, aweme_id: {aweme_id}")
-                
-                # 批量处理时的延迟，避免API限流
-                if i % batch_size == 0:
-                    self.logger.info(f"已处理 {i} 条记录，暂停1秒避免限流...")
-                    time.sleep(1)
+                    result['details'].append(RecordDetail(aweme_id, 'failed', reason or '创建失败'))
+                    self.logger.error("创建记录失败: %s, 原因: %s", aweme_id, reason)
+        
+        def update_chunk(chunk):
+            return self.update_records_batch([(record_id, fields) for _, record_id, fields, _ in chunk])
+        
+        # 只发送发生变化的统计字段
+        update_chunks = [
+            pending_updates[start:start + batch_size] for start in range(0, len(pending_updates), batch_size)
+        ]
+        if update_chunks:
+            self.logger.info(f"共有 {len(pending_updates)} 条已存在记录的统计数据发生变化，分 {len(update_chunks)} 批更新...")
+        for chunk, reasons in self._run_batches(update_chunk, update_chunks):
+            self._persist_state([
+                (aweme_id, record_id, self._stats_hash(self._extract_statistics(video_info)))
+                for (aweme_id, record_id, _, video_info), reason in zip(chunk, reasons) if reason is None
+            ])
+            self._journal(journal_key, [
+                aweme_id for (aweme_id, _, _, _), reason in zip(chunk, reasons) if reason is None
+            ])
+            for (aweme_id, record_id, _, video_info), reason in zip(chunk, reasons):
+                if reason is None:
+                    self._remember_record(aweme_id, record_id, video_info)
+                    result['updated_count'] += 1
+                    result['details'].append(RecordDetail(aweme_id, 'updated'))
                 else:
-                    time.sleep(0.3)  # 增加延迟时间
-                
-            except Exception as e:
-                self.logger.error(f"处理记录时出错: {e}, aweme_id: {aweme_id}")
-                result['failed_count'] += 1
-                result['details'].append({
-                    'aweme_id': aweme_id,
-                    'status': 'error',
-                    'reason': str(e)
-                })
-        
-        # 输出结果统计
+                    result['failed_count'] += 1
+                    result['details'].append(RecordDetail(aweme_id, 'failed', reason))
+                    self.logger.error("更新记录失败: %s, 原因: %s", aweme_id, reason)
+    
+    def _log_result(self, result: Dict):
+        """输出结果统计"""
         self.logger.info(f"批量写入完成:")
         self.logger.info(f"总计: {result['total']} 条")
         self.logger.info(f"成功: {result['success_count']} 条")
+        self.logger.info(f"更新: {result['updated_count']} 条")
         self.logger.info(f"失败: {result['failed_count']} 条")
         self.logger.info(f"跳过: {result['skipped_count']} 条")
-        
-        return result
+        self.logger.info(f"字段缓存: 命中 {self.schema_cache_hits} 次，未命中 {self.schema_cache_misses} 次")
+        for endpoint, stats in self.rate_limiters.stats().items():
+            self.logger.info(
+                f"接口限速 {endpoint}: 当前 {stats['rate']} req/s，"
+                f"请求 {stats['requests']} 次，触发限流 {stats['rate_limited']} 次"
+            )
+        retry_stats = self.retry_policy.stats()
+        self.logger.info(
+            f"重试: {retry_stats['retries']} 次，累计等待 {retry_stats['retry_time']} 秒，"
+            f"熔断 {retry_stats['circuit_opened']} 次，熔断期间拒绝 {retry_stats['rejected']} 次"
+        )
+    
+    def close(self):
+        """释放写入器资源，共用的连接由客户端池管理，不再被任何写入器持有后才可能被淘汰"""
+        self.rest_transport = None
+        if self.client_entry is not None and not self._released:
+            self._released = True
+            self.client_pool.release(self.client_entry)
     
-    @retry_on_failure(max_retries=3, delay=1.0)
     def update_record(self, record_id: str, video_info: Dict) -> bool:
         """更新记录"""
         try:
             # 准备更新字段（只更新可变的统计数据）
             fields = {
-                "desc": self.data_mapper.convert_value('desc', video_info.get('desc', '')),
-                "statistics_digg_count": self.data_mapper.convert_value('statistics_digg_count', 
-                                                                      video_info.get('statistics', {}).get('digg_count', 0)),
-                "statistics_comment_count": self.data_mapper.convert_value('statistics_comment_count', 
-                                                                         video_info.get('statistics', {}).get('comment_count', 0)),
-                "statistics_share_count": self.data_mapper.convert_value('statistics_share_count', 
-                                                                       video_info.get('statistics', {}).get('share_count', 0)),
-                "statistics_play_count": self.data_mapper.convert_value('statistics_play_count', 
-                                                                      video_info.get('statistics', {}).get('play_count', 0)),
-                "sync_time": self.data_mapper.convert_value('sync_time', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                'desc': self.data_mapper.convert_value('desc', video_info.get('title', '') or video_info.get('desc', '')),
+                'sync_time': int(time.time() * 1000)
             }
+            fields.update(self._extract_statistics(video_info))
+            
+            # 只更新表格中存在的字段
+            available_fields = self.get_field_schema()
+            fields = {name: value for name, value in fields.items() if name in available_fields}
             
             request = UpdateAppTableRecordRequest.builder() \
                 .table_id(self.config.table_id) \
                 .record_id(record_id) \
+                .request_body(
+                    AppTableRecord.builder()
+                    .fields(fields)
+                    .build()
+                ) \
                 .build()
             
-            request.record = AppTableRecord.builder() \
-                .fields(fields) \
-                .build()
-            
-            response = self.client.base.v1.app_table_record.update(request)
+            response = self._call_api('app_table_record.update', request)
             
             if response.code == 0:
-                self.logger.info(f"成功更新记录: {record_id}")
+                self.logger.debug("成功更新记录: %s", record_id)
                 return True
             else:
                 self.logger.error(f"更新记录失败: {response.msg}, record_id: {record_id}")
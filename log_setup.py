@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抖音抓取和飞书写入共用的日志配置
+日志记录只放入内存队列，由后台线程写到控制台和按大小轮转的日志文件，
+抓取/写入线程不会阻塞在磁盘和终端I/O上；完整请求/响应内容默认不输出
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional
+
+
+# 使用共享日志配置的模块
+LOGGER_NAMES = ('douyin_scraper', 'feishu_writer')
+# 完整请求头和响应内容使用单独的记录器，默认关闭
+PAYLOAD_LOGGER_NAME = 'douyin_scraper.payload'
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_listener = None
+
+
+def setup_logging(level: int = logging.INFO, log_file: Optional[str] = 'feishu_sync.log',
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                  log_payloads: bool = False, force: bool = False):
+    """
+    配置共享日志，重复调用时保持已有配置（force 为 True 时重新配置）
+    log_file: 日志文件路径，为空时只输出到控制台
+    log_payloads: 是否以DEBUG级别输出完整的请求/响应内容
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            if not force:
+                return
+            _stop_listener()
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        for name in LOGGER_NAMES:
+            logger = logging.getLogger(name)
+            logger.handlers = [queue_handler]
+            logger.setLevel(level)
+            logger.propagate = False
+
+        payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+        payload_logger.setLevel(logging.DEBUG if log_payloads else logging.CRITICAL + 1)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def _stop_listener():
+    """停止后台线程并写完队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def shutdown_logging():
+    """退出前调用，确保队列中的日志全部写出"""
+    with _lock:
+        _stop_listener()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取记录器，调用方未配置日志时使用默认配置"""
+    setup_logging()
+    return logging.getLogger(name)
+
+
+atexit.register(shutdown_logging)
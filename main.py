@@ -2,11 +2,18 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
+import time
+import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv, find_dotenv
 from douyin_scraper import DouyinScraper
-from feishu_writer import FeishuWriter
+from douyin_cache import PageCache
+from feishu_writer import FeishuWriter, BaseConfig, default_client_pool
+from sync_state import SyncStateStore
+from log_setup import setup_logging
 
 
 def load_config():
@@ -20,7 +27,17 @@ def load_config():
         'personal_base_token': os.environ.get('FEISHU_PERSONAL_BASE_TOKEN') or os.environ.get('PERSONAL_BASE_TOKEN'),
         'table_id': os.environ.get('FEISHU_TABLE_ID') or os.environ.get('TABLE_ID'),
         'douyin_api_base_url': os.environ.get('DOUYIN_API_BASE_URL',
-                                            'https://douyin-api.xiaomiao.win')
+                                            'https://douyin-api.xiaomiao.win'),
+        # 本地同步状态文件路径，设置为空字符串可禁用
+        'sync_state_path': os.environ.get('SYNC_STATE_PATH', '.sync_state.db'),
+        # 抖音分页响应缓存目录、有效期（秒）和大小上限（MB），目录设置为空字符串可禁用
+        'cache_dir': os.environ.get('DOUYIN_CACHE_DIR', '.douyin_cache'),
+        'cache_ttl': float(os.environ.get('DOUYIN_CACHE_TTL', 3600)),
+        'cache_max_mb': float(os.environ.get('DOUYIN_CACHE_MAX_MB', 200)),
+        # 日志文件路径（留空只输出到控制台）、单个文件大小上限（MB）和保留的轮转文件数
+        'log_file': os.environ.get('LOG_FILE', 'feishu_sync.log'),
+        'log_max_mb': float(os.environ.get('LOG_MAX_MB', 10)),
+        'log_backup_count': int(os.environ.get('LOG_BACKUP_COUNT', 5))
     }
     
     return config
@@ -56,19 +73,39 @@ def parse_arguments():
 使用示例:
   python main.py --url "https://www.douyin.com/user/xxx" --max-videos 100
   python main.py --url "https://v.douyin.com/xxx" --max-videos 50
+  python main.py --url "https://www.douyin.com/user/xxx" --upsert
+  python main.py --url "https://www.douyin.com/user/xxx" --incremental
+  python main.py --jobs jobs.yaml --workers 4
   
 环境变量配置:
   APP_TOKEN: 飞书多维表格的APP_TOKEN
   PERSONAL_BASE_TOKEN: 飞书个人访问令牌
   TABLE_ID: 多维表格的TABLE_ID
+  SYNC_STATE_PATH: 本地同步状态文件路径 (默认: .sync_state.db，留空禁用)
+  DOUYIN_CACHE_DIR: 抖音分页响应缓存目录 (默认: .douyin_cache，留空禁用)
+  DOUYIN_CACHE_TTL: 缓存有效期，单位秒 (默认: 3600)
+  DOUYIN_CACHE_MAX_MB: 缓存目录大小上限，单位MB (默认: 200)
+  LOG_FILE: 日志文件路径，按大小轮转 (默认: feishu_sync.log，留空只输出到控制台)
+  LOG_MAX_MB / LOG_BACKUP_COUNT: 单个日志文件大小上限和保留的文件数 (默认: 10 / 5)
         """
     )
     
-    parser.add_argument(
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
         '--url',
-        required=True,
         help='抖音博主的主页地址'
     )
+    target.add_argument(
+        '--jobs',
+        help='任务文件 (YAML)，一次同步多个博主，每个任务可指定自己的飞书表格和最大视频数'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='--jobs 模式下同时执行的任务数 (默认: 4)'
+    )
     
     parser.add_argument(
         '--max-videos',
@@ -80,8 +117,84 @@ def parse_arguments():
     parser.add_argument(
         '--batch-size',
         type=int,
-        default=10,
-        help='批量写入的批次大小 (默认: 10)'
+        default=FeishuWriter.MAX_BATCH_SIZE,
+        help=f'每次批量写入请求的记录数，最大 {FeishuWriter.MAX_BATCH_SIZE} (默认: {FeishuWriter.MAX_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=4,
+        help='同时在途的批量写入请求数 (默认: 4，设为1则串行写入)'
+    )
+    
+    parser.add_argument(
+        '--transport',
+        choices=['sdk', 'aiohttp'],
+        default='sdk',
+        help='批量写入使用的传输层: sdk 为 baseopensdk，aiohttp 为直接调用开放接口 (默认: sdk)'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        choices=FeishuWriter.DEDUP_MODES,
+        default='index',
+        help='已存在记录的检查方式: index 扫描全表建立索引，search 按批筛选本次抓取的视频，适合大表 (默认: index)'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='流式模式：每抓取一页立即写入，抓取与写入并行进行'
+    )
+    
+    parser.add_argument(
+        '--upsert',
+        action='store_true',
+        help='已存在的视频只更新发生变化的统计数据（点赞/评论/分享/播放/收藏）'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='增量同步：只抓取上次成功同步之后发布的视频，翻到已同步的视频即停止（需要启用本地同步状态）'
+    )
+    
+    parser.add_argument(
+        '--verify-state',
+        action='store_true',
+        help='写入前扫描一次表格，清理本地同步状态中已在表格里被删除的记录'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次中断的断点继续：不重新抓取已保存的页面，不重复写入已提交的记录'
+    )
+    
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用抖音分页响应缓存，每页都重新请求接口'
+    )
+    cache.add_argument(
+        '--refresh',
+        action='store_true',
+        help='忽略已有缓存重新抓取，并用最新响应刷新缓存（需要最新统计数据时使用）'
+    )
+    
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default='INFO',
+        help='日志级别 (默认: INFO)'
+    )
+    
+    parser.add_argument(
+        '--log-payloads',
+        action='store_true',
+        help='在日志中输出完整的抖音接口请求头和响应内容（数据量很大，仅用于排查问题）'
     )
     
     parser.add_argument(
@@ -115,10 +228,299 @@ def interactive_input():
     return {
         'url': douyin_url,
         'max_videos': max_videos,
-        'batch_size': 10
+        'batch_size': FeishuWriter.MAX_BATCH_SIZE,
+        'max_in_flight': 4,
+        'transport': 'sdk',
+        'dedup': 'index',
+        'upsert': False,
+        'verify_state': False,
+        'resume': False,
+        'stream': False,
+        'incremental': False,
+        'no_cache': False,
+        'refresh': False,
+        'workers': 1
     }
 
 
+def parse_table_url(table_url: str):
+    """从多维表格链接中提取 (APP_TOKEN, TABLE_ID)，格式: https://xxx.feishu.cn/base/APP_TOKEN?table=TABLE_ID"""
+    app_token = re.search(r'/base/([^/?#]+)', table_url)
+    table_id = re.search(r'[?&]table=([^&#]+)', table_url)
+    return (app_token.group(1) if app_token else None, table_id.group(1) if table_id else None)
+
+
+def load_jobs(path, config, params):
+    """
+    读取任务文件，格式:
+      defaults: {max_videos: 100, personal_base_token: xxx}
+      jobs:
+        - url: https://www.douyin.com/user/xxx
+          table_url: https://xxx.feishu.cn/base/APP_TOKEN?table=TABLE_ID
+          max_videos: 50
+    未指定的项依次使用 defaults、环境变量和命令行参数
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise Exception("使用 --jobs 需要先安装 PyYAML: pip install PyYAML")
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    if isinstance(data, list):
+        data = {'jobs': data}
+    defaults = data.get('defaults') or {}
+    
+    jobs = []
+    for index, entry in enumerate(data.get('jobs') or [], 1):
+        if isinstance(entry, str):
+            entry = {'url': entry}
+        options = dict(defaults)
+        options.update(entry)
+        
+        app_token, table_id = parse_table_url(options.get('table_url') or '')
+        job = {
+            'url': options.get('url') or options.get('douyin_url'),
+            'max_videos': int(options.get('max_videos') or params['max_videos']),
+            'app_token': options.get('app_token') or app_token or config['app_token'],
+            'personal_base_token': options.get('personal_base_token') or config['personal_base_token'],
+            'table_id': options.get('table_id') or table_id or config['table_id'],
+            # 任务指定了表格时直接写入该表，否则与单任务模式一样按表名查找或创建数据表
+            'fixed_table': bool(options.get('table_id') or table_id)
+        }
+        job['name'] = options.get('name') or job['url']
+        
+        if not job['url']:
+            raise ValueError(f"任务 {index} 缺少 url")
+        missing = [field.upper() for field in ('app_token', 'personal_base_token', 'table_id') if not job[field]]
+        if missing:
+            raise ValueError(f"任务 {index} ({job['name']}) 缺少配置: {', '.join(missing)}")
+        jobs.append(job)
+    
+    if not jobs:
+        raise ValueError(f"任务文件中没有任务: {path}")
+    return jobs
+
+
+def create_page_cache(params, config):
+    """
+    创建抖音分页响应缓存，未配置缓存目录或指定 --no-cache 时返回None
+    """
+    if params.get('no_cache') or not config['cache_dir']:
+        return None
+    return PageCache(
+        config['cache_dir'],
+        ttl=config['cache_ttl'],
+        max_bytes=int(config['cache_max_mb'] * 1024 * 1024),
+        refresh=params.get('refresh', False)
+    )
+
+
+def sync_creator(params, config, state_store=None, page_cache=None):
+    """
+    抓取一个博主的视频并写入飞书多维表格
+    返回写入结果；未获取到任何视频时返回None（增量同步没有新视频时返回空结果）
+    """
+    # 初始化抖音抓取器
+    print(f"\n1. 初始化抖音抓取器...")
+    scraper = DouyinScraper(config['douyin_api_base_url'], page_cache=page_cache, link_cache=state_store,
+                            page_size_store=state_store)
+    
+    # 初始化飞书写入器
+    print(f"2. 初始化飞书多维表格写入器...")
+    feishu_config = BaseConfig(
+        app_token=config['app_token'],
+        personal_base_token=config['personal_base_token'],
+        table_id=config['table_id'],
+        region='domestic',
+        fixed_table=config.get('fixed_table', False)
+    )
+    writer = FeishuWriter(
+        feishu_config,
+        state_store=state_store,
+        max_in_flight=params['max_in_flight'],
+        transport=params['transport'],
+        dedup=params['dedup']
+    )
+    
+    try:
+        # 启动时一次性准备数据表并补齐缺少的字段，之后的写入不再访问数据表和字段接口
+        if not writer.provision_schema():
+            raise Exception("准备飞书表格和字段失败，请检查日志")
+        
+        if params['verify_state'] and state_store is not None:
+            removed = writer.verify_sync_state()
+            print(f"   - 同步状态校验: 清理 {removed} 条失效记录")
+        
+        # 以抖音链接作为写入日志的任务标识，非续跑时清除上次残留的日志
+        job_key = params['url']
+        if state_store is not None and not params['resume']:
+            state_store.clear_journal(feishu_config.app_token, feishu_config.table_id, job_key)
+        journal_key = job_key if state_store is not None else None
+        # 抓取断点同样按目标表格区分，同一博主写入不同表格的任务互不影响
+        checkpoints = (state_store.scrape_checkpoints(feishu_config.app_token, feishu_config.table_id)
+                       if state_store is not None else None)
+        
+        # 增量同步：读取该博主在这张表格上的高水位，只抓取更新的视频
+        sec_user_id = scraper.extract_sec_user_id(params['url']) if state_store is not None else None
+        high_water_mark = None
+        if params.get('incremental') and sec_user_id:
+            high_water_mark = state_store.get_high_water_mark(
+                feishu_config.app_token, feishu_config.table_id, sec_user_id
+            )
+        newest = {'mark': high_water_mark}
+        # 抓取结束后由抓取器写入 complete：是否已越过高水位或翻到最后一页
+        progress = {}
+        
+        def track_newest(pages):
+            for page_videos in pages:
+                newest['mark'] = DouyinScraper.newest_video_mark(page_videos, newest['mark'])
+                yield page_videos
+        
+        print(f"3. 开始抓取视频信息...")
+        print(f"   - 抖音链接: {params['url']}")
+        print(f"   - 最大视频数: {params['max_videos']}")
+        if params.get('incremental'):
+            print(f"   - 增量同步: {'从上次同步的最新视频之后开始' if high_water_mark else '没有同步记录，完整抓取'}")
+        
+        if params['stream']:
+            # 边抓取边写入，第1页的写入与第2页的抓取重叠进行
+            print(f"   - 流式模式: 每抓取一页立即写入飞书多维表格")
+            pages = scraper.iter_video_pages(
+                params['url'],
+                params['max_videos'],
+                checkpoint_store=checkpoints,
+                resume=params['resume'],
+                high_water_mark=high_water_mark,
+                progress=progress
+            )
+            result = writer.sync_stream(
+                track_newest(pages),
+                params['batch_size'],
+                upsert=params['upsert'],
+                journal_key=journal_key
+            )
+            
+            if result['total'] == 0 and high_water_mark is None:
+                return None
+        else:
+            videos = scraper.fetch_all_videos(
+                params['url'],
+                params['max_videos'],
+                checkpoint_store=checkpoints,
+                resume=params['resume'],
+                high_water_mark=high_water_mark,
+                progress=progress
+            )
+            
+            if not videos and high_water_mark is None:
+                return None
+            
+            newest['mark'] = DouyinScraper.newest_video_mark(videos, newest['mark'])
+            print(f"   - 成功获取 {len(videos)} 个视频信息")
+            
+            # 批量写入数据
+            print(f"4. 开始写入飞书多维表格...")
+            result = writer.batch_create_records(
+                videos,
+                params['batch_size'],
+                upsert=params['upsert'],
+                journal_key=journal_key
+            )
+        
+        # 全部成功后清除断点和写入日志；只有同时抓取完整（越过原高水位或已到最后一页）时才推进高水位，
+        # 否则因数量上限或请求失败而未抓取的视频在下次增量同步时会被跳过
+        if result['failed_count'] == 0 and state_store is not None:
+            state_store.clear_journal(feishu_config.app_token, feishu_config.table_id, job_key)
+            if sec_user_id:
+                checkpoints.clear_scrape_checkpoint(sec_user_id)
+                if newest['mark'] and progress.get('complete'):
+                    state_store.save_high_water_mark(
+                        feishu_config.app_token, feishu_config.table_id, sec_user_id, newest['mark']
+                    )
+        
+        return result
+    finally:
+        writer.close()
+
+
+def run_jobs(jobs, params, config, state_store, workers, page_cache=None):
+    """
+    用工作线程池执行多个同步任务：空闲的线程领取下一个任务，单个慢任务不会阻塞其他任务
+    结束后输出每个任务的结果和总体吞吐量
+    """
+    workers = max(1, min(workers, len(jobs)))
+    print(f"共 {len(jobs)} 个任务，并发执行 {workers} 个")
+    
+    # 先并发解析全部短链接并保存到本地状态，各任务不再逐个阻塞在重定向上
+    short_links = [job['url'] for job in jobs if DouyinScraper.is_short_link(job['url'])]
+    if short_links and state_store is not None:
+        resolver = DouyinScraper(config['douyin_api_base_url'], link_cache=state_store)
+        resolved = resolver.resolve_sec_user_ids(short_links)
+        print(f"短链接解析: {sum(1 for sec_user_id in resolved.values() if sec_user_id)}/{len(resolved)} 个成功")
+    
+    def run(job):
+        job_params = dict(params, url=job['url'], max_videos=job['max_videos'])
+        job_config = dict(
+            config,
+            app_token=job['app_token'],
+            personal_base_token=job['personal_base_token'],
+            table_id=job['table_id'],
+            fixed_table=job['fixed_table']
+        )
+        started = time.perf_counter()
+        try:
+            result = sync_creator(job_params, job_config, state_store, page_cache)
+            error = None if result is not None else '未获取到视频'
+        except Exception as e:
+            result, error = None, str(e)
+        return {'job': job, 'result': result, 'error': error, 'elapsed': time.perf_counter() - started}
+    
+    started = time.perf_counter()
+    summaries = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync-job') as executor:
+        futures = {executor.submit(run, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries[futures[future]] = summary
+            status = summary['error'] or '完成'
+            print(f"[{len(summaries)}/{len(jobs)}] {summary['job']['name']}: {status}，用时 {summary['elapsed']:.1f}s")
+    elapsed = time.perf_counter() - started
+    
+    ordered = [summaries[index] for index in range(len(jobs))]
+    print_job_summary(ordered, elapsed)
+    return 0 if all(not s['error'] and s['result']['failed_count'] == 0 for s in ordered) else 1
+
+
+def print_job_summary(summaries, elapsed):
+    """输出每个任务的结果表和总体吞吐量"""
+    print(f"\n{'=' * 96}")
+    print(f"{'任务':<40} {'表格':<18} {'处理':>6} {'新增':>6} {'更新':>6} {'跳过':>6} {'失败':>6} {'用时(s)':>8}  状态")
+    print('-' * 96)
+    
+    totals = {'total': 0, 'success_count': 0, 'updated_count': 0, 'skipped_count': 0, 'failed_count': 0}
+    for summary in summaries:
+        job = summary['job']
+        result = summary['result'] or dict.fromkeys(totals, 0)
+        for key in totals:
+            totals[key] += result[key]
+        if summary['error']:
+            status = summary['error']
+        else:
+            status = '部分失败' if result['failed_count'] else '成功'
+        print(f"{job['name'][:40]:<40} {job['table_id'][:18]:<18} {result['total']:>6} {result['success_count']:>6} "
+              f"{result['updated_count']:>6} {result['skipped_count']:>6} {result['failed_count']:>6} "
+              f"{summary['elapsed']:>8.1f}  {status}")
+    
+    print('-' * 96)
+    succeeded = sum(1 for s in summaries if not s['error'] and s['result']['failed_count'] == 0)
+    throughput = totals['total'] / elapsed if elapsed > 0 else 0.0
+    print(f"任务: {succeeded}/{len(summaries)} 成功，处理 {totals['total']} 条视频，"
+          f"新增 {totals['success_count']} 条，更新 {totals['updated_count']} 条，"
+          f"跳过 {totals['skipped_count']} 条，失败 {totals['failed_count']} 条")
+    print(f"总用时 {elapsed:.1f}s，吞吐量 {throughput:.1f} 条/秒")
+
+
 def main():
     """
     主函数
@@ -131,8 +533,22 @@ def main():
         args = parse_arguments()
         params = {
             'url': args.url,
+            'jobs': args.jobs,
             'max_videos': args.max_videos,
-            'batch_size': args.batch_size
+            'batch_size': args.batch_size,
+            'max_in_flight': args.max_in_flight,
+            'transport': args.transport,
+            'dedup': args.dedup,
+            'upsert': args.upsert,
+            'verify_state': args.verify_state,
+            'resume': args.resume,
+            'stream': args.stream,
+            'incremental': args.incremental,
+            'no_cache': args.no_cache,
+            'refresh': args.refresh,
+            'workers': args.workers,
+            'log_level': args.log_level,
+            'log_payloads': args.log_payloads
         }
     else:
         # 交互式输入
@@ -140,53 +556,60 @@ def main():
         if not params:
             return 1
     
-    # 加载配置
+    # 加载配置；任务文件中的每个任务可以自带飞书表格配置
     config = load_config()
-    if not validate_config(config):
+    setup_logging(
+        level=getattr(logging, params.get('log_level', 'INFO')),
+        log_file=config['log_file'],
+        max_bytes=int(config['log_max_mb'] * 1024 * 1024),
+        backup_count=config['log_backup_count'],
+        log_payloads=params.get('log_payloads', False)
+    )
+    jobs = None
+    if params.get('jobs'):
+        try:
+            jobs = load_jobs(params['jobs'], config, params)
+        except Exception as e:
+            print(f"错误: 读取任务文件失败: {e}")
+            return 1
+    elif not validate_config(config):
         return 1
     
+    state_store = None
     try:
-        # 初始化抖音抓取器
-        print(f"\n1. 初始化抖音抓取器...")
-        scraper = DouyinScraper(config['douyin_api_base_url'])
+        if config['sync_state_path']:
+            state_store = SyncStateStore(config['sync_state_path'])
+            print(f"本地同步状态: {config['sync_state_path']}")
+        elif params['resume']:
+            print("警告: 未配置 SYNC_STATE_PATH，无法从断点续跑")
+        elif params.get('incremental'):
+            print("警告: 未配置 SYNC_STATE_PATH，无法增量同步，将完整抓取")
         
-        # 抓取视频信息
-        print(f"2. 开始抓取视频信息...")
-        print(f"   - 抖音链接: {params['url']}")
-        print(f"   - 最大视频数: {params['max_videos']}")
+        page_cache = create_page_cache(params, config)
+        if page_cache is not None:
+            mode = '刷新' if page_cache.refresh else f'有效期 {page_cache.ttl:.0f} 秒'
+            print(f"抖音分页缓存: {config['cache_dir']} ({mode})")
         
-        videos = scraper.fetch_all_videos(params['url'], params['max_videos'])
+        if jobs is not None:
+            return run_jobs(jobs, params, config, state_store, params['workers'], page_cache)
         
-        if not videos:
+        result = sync_creator(params, config, state_store, page_cache)
+        if result is None:
             print("错误: 未能获取到任何视频信息")
             return 1
         
-        print(f"   - 成功获取 {len(videos)} 个视频信息")
-        
-        # 初始化飞书写入器
-        print(f"\n3. 初始化飞书多维表格写入器...")
-        from feishu_writer import BaseConfig
-        feishu_config = BaseConfig(
-            app_token=config['app_token'],
-            personal_base_token=config['personal_base_token'],
-            table_id=config['table_id'],
-            region='domestic'
-        )
-        writer = FeishuWriter(feishu_config)
-        
-        # 批量写入数据
-        print(f"4. 开始写入飞书多维表格...")
-        result = writer.batch_create_records(videos, params['batch_size'])
-        
         # 显示结果
-        print(f"\n5. 同步完成!")
+        print(f"\n同步完成!")
         print(f"   - 总计处理: {result['total']} 条记录")
         print(f"   - 成功写入: {result['success_count']} 条记录")
+        print(f"   - 更新统计: {result['updated_count']} 条记录")
         print(f"   - 跳过重复: {result['skipped_count']} 条记录")
         print(f"   - 写入失败: {result['failed_count']} 条记录")
         
         if result['failed_count'] > 0:
             print(f"\n注意: 有 {result['failed_count']} 条记录写入失败，请检查日志")
+            if state_store is not None:
+                print("可使用 --resume 从断点继续，已提交的记录不会重复写入")
             return 1
         
         print("\n✅ 所有操作完成!")
@@ -200,7 +623,11 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
-
+    finally:
+        # 关闭各租户共用的连接池，停止 aiohttp 传输层的后台事件循环
+        default_client_pool.close()
+        if state_store is not None:
+            state_store.close()
 
 if __name__ == "__main__":
     exit_code = main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书接口自适应限流器
+基于令牌桶实现，遇到限流错误时按AIMD策略降速，请求成功后逐步提速
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# 飞书开放平台表示请求频率超限的错误码
+RATE_LIMIT_CODES = {99991400, 1254290}
+
+
+def is_rate_limited(response: Any) -> bool:
+    """判断接口响应是否为限流错误"""
+    if getattr(response, 'code', None) in RATE_LIMIT_CODES:
+        return True
+    raw = getattr(response, 'raw', None)
+    return getattr(raw, 'status_code', None) == 429
+
+
+class AdaptiveRateLimiter:
+    """AIMD自适应令牌桶限流器（线程安全）"""
+
+    def __init__(self, name: str, rate: float = 5.0, min_rate: float = 0.5, max_rate: float = 20.0,
+                 increase_step: float = 0.2, decrease_factor: float = 0.5,
+                 log_interval: float = 30.0, logger: Optional[logging.Logger] = None):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.log_interval = log_interval
+        self.logger = logger or logging.getLogger('feishu_writer.rate_limiter')
+
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+
+        # 统计实际请求速率
+        self.total_requests = 0
+        self.rate_limited_count = 0
+        self._window_start = self._last_refill
+        self._window_requests = 0
+
+    @property
+    def capacity(self) -> float:
+        """令牌桶容量，最多允许一秒的突发请求"""
+        return max(1.0, self.rate)
+
+    def _refill(self, now: float):
+        """按当前速率补充令牌"""
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """获取一个令牌，不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self._record_request(now)
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def _record_request(self, now: float):
+        """记录请求并定期输出实际速率"""
+        self.total_requests += 1
+        self._window_requests += 1
+        elapsed = now - self._window_start
+        if elapsed >= self.log_interval:
+            self.logger.info(
+                f"[{self.name}] 限速 {self.rate:.2f} req/s，实际 {self._window_requests / elapsed:.2f} req/s"
+            )
+            self._window_start = now
+            self._window_requests = 0
+
+    def on_success(self):
+        """请求成功，线性提速"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_rate_limited(self):
+        """遇到限流，成倍降速并清空令牌"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            self.rate_limited_count += 1
+            rate = self.rate
+        self.logger.warning(f"[{self.name}] 触发限流，降速至 {rate:.2f} req/s")
+
+
+class RateLimiterRegistry:
+    """
+    按接口维护限流器，所有飞书接口调用都通过 call 发出
+    call 只负责限速和按结果调整速率，每次调用只发一次请求；限流后的重发由 retry_policy.RetryPolicy 负责
+    """
+
+    def __init__(self, endpoint_limits: Optional[Dict[str, Dict]] = None,
+                 default_limits: Optional[Dict] = None, logger: Optional[logging.Logger] = None):
+        self.endpoint_limits = endpoint_limits or {}
+        self.default_limits = default_limits or {}
+        self.logger = logger or logging.getLogger('feishu_writer.rate_limiter')
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> AdaptiveRateLimiter:
+        """获取（必要时创建）某个接口的限流器"""
+        with self._lock:
+            limiter = self._limiters.get(endpoint)
+            if limiter is None:
+                limits = dict(self.default_limits)
+                limits.update(self.endpoint_limits.get(endpoint, {}))
+                limiter = AdaptiveRateLimiter(endpoint, logger=self.logger, **limits)
+                self._limiters[endpoint] = limiter
+            return limiter
+
+    def call(self, endpoint: str, func: Callable, *args, **kwargs) -> Any:
+        """限流后调用一次接口，遇到限流响应时降速，响应或异常原样交给调用方"""
+        limiter = self.get(endpoint)
+        limiter.acquire()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            if '429' in str(e):
+                limiter.on_rate_limited()
+            raise
+
+        if is_rate_limited(response):
+            limiter.on_rate_limited()
+        else:
+            limiter.on_success()
+        return response
+
+    def stats(self) -> Dict[str, Dict]:
+        """各接口的限流统计"""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {
+            limiter.name: {
+                'rate': round(limiter.rate, 2),
+                'requests': limiter.total_requests,
+                'rate_limited': limiter.rate_limited_count
+            }
+            for limiter in limiters
+        }
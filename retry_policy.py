@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书接口重试策略
+区分可重试错误（超时、5xx、限流）与永久错误（字段类型、鉴权），
+使用带抖动的指数退避，限制单次运行的总重试时间，并在连续失败后熔断
+"""
+
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from rate_limiter import RATE_LIMIT_CODES
+
+
+# 服务端暂时不可用、可以重试的错误码
+RETRYABLE_CODES = RATE_LIMIT_CODES | {
+    1254291,  # 写冲突
+    1254607,  # 数据未就绪
+    1255001, 1255002, 1255003, 1255004, 1255005, 1255006,  # 服务内部错误
+    1255040,  # 请求超时
+}
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间直接拒绝请求"""
+
+
+def _status_code(response: Any) -> Optional[int]:
+    """读取响应的HTTP状态码"""
+    raw = getattr(response, 'raw', None)
+    return getattr(raw, 'status_code', None)
+
+
+def is_retryable_response(response: Any) -> bool:
+    """判断失败响应是否可以重试"""
+    if getattr(response, 'code', None) in RETRYABLE_CODES:
+        return True
+    status = _status_code(response)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def is_retryable_exception(error: BaseException) -> bool:
+    """判断异常是否可以重试：超时、连接错误和5xx/429"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, socket.timeout, ConnectionError)):
+        return True
+    # requests / aiohttp 的网络异常均以类名区分，避免对可选依赖的硬引用
+    name = type(error).__name__
+    if any(word in name for word in ('Timeout', 'Connection', 'ServerDisconnected', 'ClientOSError')):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    message = str(error)
+    return '429' in message or 'timed out' in message.lower()
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+    连续失败 failure_threshold 次后打开，recovery_timeout 秒后放行一次探测请求，
+    探测成功则关闭，失败则重新打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.open_count = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """当前是否允许发出请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """探测请求没有得到能判断服务状态的结果（如本地异常）时释放探测名额，由下一次请求重新探测"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        """请求成功，关闭熔断器"""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """记录一次可重试的失败，返回熔断器是否因此打开"""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                if opened:
+                    self.open_count += 1
+                return opened
+            return False
+
+
+class RetryPolicy:
+    """
+    重试策略，所有飞书接口调用通过 call 发出
+    - 永久错误直接返回/抛出，不重试
+    - 可重试错误按 full jitter 指数退避重试，最多 max_attempts 次
+    - 单次运行累计退避时间不超过 retry_budget 秒，耗尽后不再重试
+    - 可重试错误连续出现时打开熔断器，打开期间直接抛出 CircuitOpenError
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 retry_budget: float = 120.0, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 logger: Optional[logging.Logger] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.logger = logger or logging.getLogger('feishu_writer.retry')
+
+        self._lock = threading.Lock()
+        self.retry_count = 0
+        self.retry_time = 0.0
+        self.rejected_count = 0
+
+    def _backoff(self, attempt: int) -> Optional[float]:
+        """计算本次退避时间，超出重试预算时返回None"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        with self._lock:
+            if self.retry_time + delay > self.retry_budget:
+                return None
+            self.retry_time += delay
+            self.retry_count += 1
+        return delay
+
+    def _on_failure(self, endpoint: str, attempt: int) -> Optional[float]:
+        """记录可重试的失败，返回下次重试前的等待时间；不再重试时返回None"""
+        if self.breaker.record_failure():
+            self.logger.error(f"[{endpoint}] 连续失败，熔断 {self.breaker.recovery_timeout:.0f} 秒")
+        if attempt >= self.max_attempts - 1 or self.breaker.state == CircuitBreaker.OPEN:
+            return None
+        return self._backoff(attempt)
+
+    def call(self, endpoint: str, func: Callable, *args, **kwargs) -> Any:
+        """按策略调用接口，返回最后一次响应或抛出最后一次异常"""
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                with self._lock:
+                    self.rejected_count += 1
+                raise CircuitOpenError(f"[{endpoint}] 飞书接口连续失败，熔断中")
+
+            try:
+                response = func(*args, **kwargs)
+            except BaseException as e:
+                if not isinstance(e, Exception) or not is_retryable_exception(e):
+                    # 成功和失败都没有记录，必须释放探测名额，否则半开状态的熔断器会一直拒绝请求
+                    self.breaker.release_probe()
+                    raise
+                delay = self._on_failure(endpoint, attempt)
+                if delay is None:
+                    self.logger.error(f"[{endpoint}] 请求失败，不再重试: {e}")
+                    raise
+                self.logger.warning(f"[{endpoint}] 第 {attempt + 1} 次请求失败: {e}，{delay:.1f}秒后重试")
+                time.sleep(delay)
+                continue
+
+            if getattr(response, 'code', 0) == 0 or not is_retryable_response(response):
+                # 成功或永久错误：服务可用，交给调用方处理响应
+                self.breaker.record_success()
+                return response
+
+            delay = self._on_failure(endpoint, attempt)
+            if delay is None:
+                return response
+            self.logger.warning(
+                f"[{endpoint}] 第 {attempt + 1} 次请求返回可重试错误: {getattr(response, 'msg', '')}，"
+                f"{delay:.1f}秒后重试"
+            )
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """重试统计"""
+        return {
+            'retries': self.retry_count,
+            'retry_time': round(self.retry_time, 1),
+            'rejected': self.rejected_count,
+            'circuit_opened': self.breaker.open_count,
+            'circuit_state': self.breaker.state
+        }
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地同步状态存储
+使用SQLite记录每条视频写入飞书后的record_id和统计数据指纹，跨运行复用；
+同时保存抓取断点和写入日志，用于中断后续跑
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+
+def compute_stats_hash(stats: Dict) -> str:
+    """计算统计数据的指纹，用于判断是否需要重新写入"""
+    payload = json.dumps(stats, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class SyncStateStore:
+    """
+    同步状态存储
+    - sync_records: (app_token, table_id, aweme_id) -> record_id / 统计指纹 / 同步时间
+    - scrape_checkpoints / scrape_pages: (app_token, table_id, sec_user_id) -> 抓取断点及已抓取的页面数据，
+      同一博主写入不同表格的任务各自续跑
+    - write_journal: 某次同步任务中已提交到飞书的aweme_id
+    - short_links: 短链接 -> sec_user_id，解析结果不会变化，长期保存
+    - high_water_marks: (app_token, table_id, sec_user_id) -> 已同步的最新视频，用于增量抓取
+    - page_sizes: api_base_url -> 学习到的每页请求视频数
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建状态表"""
+        with self._lock, self._conn:
+            # 旧版本的抓取断点只按 sec_user_id 区分，无法判断属于哪张表格，直接丢弃
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(scrape_checkpoints)")]
+            if columns and 'app_token' not in columns:
+                self._conn.execute("DROP TABLE scrape_checkpoints")
+                self._conn.execute("DROP TABLE IF EXISTS scrape_pages")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_records (
+                    app_token TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    aweme_id TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    stats_hash TEXT NOT NULL,
+                    synced_at INTEGER NOT NULL,
+                    PRIMARY KEY (app_token, table_id, aweme_id)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+                    app_token TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    sec_user_id TEXT NOT NULL,
+                    max_cursor INTEGER NOT NULL,
+                    page_num INTEGER NOT NULL,
+                    has_more INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (app_token, table_id, sec_user_id)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_pages (
+                    app_token TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    sec_user_id TEXT NOT NULL,
+                    page_num INTEGER NOT NULL,
+                    videos TEXT NOT NULL,
+                    PRIMARY KEY (app_token, table_id, sec_user_id, page_num)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS write_journal (
+                    app_token TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    job_key TEXT NOT NULL,
+                    aweme_id TEXT NOT NULL,
+                    PRIMARY KEY (app_token, table_id, job_key, aweme_id)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS short_links (
+                    url TEXT PRIMARY KEY,
+                    sec_user_id TEXT NOT NULL,
+                    resolved_at INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS high_water_marks (
+                    app_token TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    sec_user_id TEXT NOT NULL,
+                    create_timestamp INTEGER NOT NULL,
+                    aweme_id TEXT NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (app_token, table_id, sec_user_id)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page_sizes (
+                    api_base_url TEXT PRIMARY KEY,
+                    page_size INTEGER NOT NULL,
+                    confirmed_size INTEGER NOT NULL,
+                    max_size INTEGER,
+                    updated_at INTEGER NOT NULL
+                )
+                """
+            )
+
+    def get_records(self, app_token: str, table_id: str) -> Dict[str, Tuple[str, str]]:
+        """读取某张表的全部状态: aweme_id -> (record_id, stats_hash)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT aweme_id, record_id, stats_hash FROM sync_records "
+                "WHERE app_token = ? AND table_id = ?",
+                (app_token, table_id)
+            ).fetchall()
+        return {aweme_id: (record_id, stats_hash) for aweme_id, record_id, stats_hash in rows}
+
+    def get_record(self, app_token: str, table_id: str, aweme_id: str) -> Optional[Tuple[str, str]]:
+        """读取单条视频的状态"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record_id, stats_hash FROM sync_records "
+                "WHERE app_token = ? AND table_id = ? AND aweme_id = ?",
+                (app_token, table_id, aweme_id)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def upsert_records(self, app_token: str, table_id: str, rows: List[Tuple[str, str, str]]):
+        """写入或覆盖状态，rows 为 (aweme_id, record_id, stats_hash) 列表"""
+        if not rows:
+            return
+        synced_at = int(time.time())
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sync_records "
+                "(app_token, table_id, aweme_id, record_id, stats_hash, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(app_token, table_id, aweme_id, record_id, stats_hash, synced_at)
+                 for aweme_id, record_id, stats_hash in rows]
+            )
+
+    def delete_records(self, app_token: str, table_id: str, aweme_ids: List[str]):
+        """删除已失效的状态"""
+        if not aweme_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM sync_records WHERE app_token = ? AND table_id = ? AND aweme_id = ?",
+                [(app_token, table_id, aweme_id) for aweme_id in aweme_ids]
+            )
+
+    def save_scrape_page(self, app_token: str, table_id: str, sec_user_id: str, page_num: int,
+                         videos: List[Mapping], next_cursor: int, has_more: bool):
+        """保存写入某张表格的任务抓取到的一页结果，并把断点推进到下一页"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_pages (app_token, table_id, sec_user_id, page_num, videos) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (app_token, table_id, sec_user_id, page_num,
+                 json.dumps([dict(video) for video in videos], ensure_ascii=False))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_checkpoints "
+                "(app_token, table_id, sec_user_id, max_cursor, page_num, has_more, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (app_token, table_id, sec_user_id, next_cursor, page_num + 1, int(bool(has_more)), int(time.time()))
+            )
+
+    def load_scrape_checkpoint(self, app_token: str, table_id: str, sec_user_id: str) -> Optional[Dict]:
+        """读取抓取断点: max_cursor / page_num / has_more / 已抓取的视频"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max_cursor, page_num, has_more FROM scrape_checkpoints "
+                "WHERE app_token = ? AND table_id = ? AND sec_user_id = ?",
+                (app_token, table_id, sec_user_id)
+            ).fetchone()
+            if not row:
+                return None
+            pages = self._conn.execute(
+                "SELECT videos FROM scrape_pages WHERE app_token = ? AND table_id = ? AND sec_user_id = ? "
+                "ORDER BY page_num",
+                (app_token, table_id, sec_user_id)
+            ).fetchall()
+
+        videos = []
+        for (page_videos,) in pages:
+            videos.extend(json.loads(page_videos))
+        return {
+            'max_cursor': row[0],
+            'page_num': row[1],
+            'has_more': bool(row[2]),
+            'videos': videos
+        }
+
+    def clear_scrape_checkpoint(self, app_token: str, table_id: str, sec_user_id: str):
+        """清除抓取断点"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM scrape_checkpoints WHERE app_token = ? AND table_id = ? AND sec_user_id = ?",
+                (app_token, table_id, sec_user_id)
+            )
+            self._conn.execute(
+                "DELETE FROM scrape_pages WHERE app_token = ? AND table_id = ? AND sec_user_id = ?",
+                (app_token, table_id, sec_user_id)
+            )
+
+    def scrape_checkpoints(self, app_token: str, table_id: str) -> 'ScrapeCheckpoints':
+        """获取写入某张表格的任务使用的抓取断点，交给抓取器的 checkpoint_store"""
+        return ScrapeCheckpoints(self, app_token, table_id)
+
+    def get_journal(self, app_token: str, table_id: str, job_key: str) -> Set[str]:
+        """读取某次同步任务已提交的aweme_id"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT aweme_id FROM write_journal WHERE app_token = ? AND table_id = ? AND job_key = ?",
+                (app_token, table_id, job_key)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add_journal(self, app_token: str, table_id: str, job_key: str, aweme_ids: List[str]):
+        """记录已提交到飞书的aweme_id"""
+        if not aweme_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO write_journal (app_token, table_id, job_key, aweme_id) VALUES (?, ?, ?, ?)",
+                [(app_token, table_id, job_key, aweme_id) for aweme_id in aweme_ids]
+            )
+
+    def clear_journal(self, app_token: str, table_id: str, job_key: str):
+        """清除某次同步任务的写入日志"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM write_journal WHERE app_token = ? AND table_id = ? AND job_key = ?",
+                (app_token, table_id, job_key)
+            )
+
+    def get_short_link(self, url: str) -> Optional[str]:
+        """读取短链接已解析的sec_user_id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sec_user_id FROM short_links WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_short_link(self, url: str, sec_user_id: str):
+        """保存短链接的解析结果"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO short_links (url, sec_user_id, resolved_at) VALUES (?, ?, ?)",
+                (url, sec_user_id, int(time.time()))
+            )
+
+    def get_high_water_mark(self, app_token: str, table_id: str, sec_user_id: str) -> Optional[Dict]:
+        """读取某个博主已同步到该表格的最新视频: create_timestamp / aweme_id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT create_timestamp, aweme_id FROM high_water_marks "
+                "WHERE app_token = ? AND table_id = ? AND sec_user_id = ?",
+                (app_token, table_id, sec_user_id)
+            ).fetchone()
+        return {'create_timestamp': row[0], 'aweme_id': row[1]} if row else None
+
+    def save_high_water_mark(self, app_token: str, table_id: str, sec_user_id: str, mark: Dict):
+        """推进高水位，只会前进不会后退"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT create_timestamp FROM high_water_marks "
+                "WHERE app_token = ? AND table_id = ? AND sec_user_id = ?",
+                (app_token, table_id, sec_user_id)
+            ).fetchone()
+            if row and row[0] > mark['create_timestamp']:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO high_water_marks "
+                "(app_token, table_id, sec_user_id, create_timestamp, aweme_id, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (app_token, table_id, sec_user_id, mark['create_timestamp'], mark['aweme_id'], int(time.time()))
+            )
+
+    def get_page_size(self, api_base_url: str) -> Optional[Dict]:
+        """读取某个接口学习到的每页视频数: page_size / confirmed_size / max_size"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_size, confirmed_size, max_size FROM page_sizes WHERE api_base_url = ?",
+                (api_base_url,)
+            ).fetchone()
+        return {'page_size': row[0], 'confirmed_size': row[1], 'max_size': row[2]} if row else None
+
+    def save_page_size(self, api_base_url: str, page_size: int, confirmed_size: int, max_size: Optional[int]):
+        """保存某个接口学习到的每页视频数"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_sizes "
+                "(api_base_url, page_size, confirmed_size, max_size, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (api_base_url, page_size, confirmed_size, max_size, int(time.time()))
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class ScrapeCheckpoints:
+    """绑定到一张目标表格的抓取断点，抓取器只需按 sec_user_id 读写"""
+
+    def __init__(self, store: SyncStateStore, app_token: str, table_id: str):
+        self.store = store
+        self.app_token = app_token
+        self.table_id = table_id
+
+    def save_scrape_page(self, sec_user_id: str, page_num: int, videos: List[Mapping],
+                         next_cursor: int, has_more: bool):
+        """保存一页抓取结果，并把断点推进到下一页"""
+        self.store.save_scrape_page(self.app_token, self.table_id, sec_user_id, page_num,
+                                    videos, next_cursor, has_more)
+
+    def load_scrape_checkpoint(self, sec_user_id: str) -> Optional[Dict]:
+        """读取抓取断点"""
+        return self.store.load_scrape_checkpoint(self.app_token, self.table_id, sec_user_id)
+
+    def clear_scrape_checkpoint(self, sec_user_id: str):
+        """清除抓取断点"""
+        self.store.clear_scrape_checkpoint(self.app_token, self.table_id, sec_user_id)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量新增的重试去重测试
+模拟服务端已写入、客户端却超时的情况，重试必须沿用同一个 client_token，表格中不能出现重复记录
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from feishu_writer import BaseClientEntry, BaseConfig, FeishuWriter
+from rate_limiter import RateLimiterRegistry
+from retry_policy import RetryPolicy
+
+
+class FakeBitable:
+    """按 client_token 去重的批量新增接口，首次请求写入后抛出超时"""
+
+    def __init__(self, timeouts: int = 1):
+        self.timeouts = timeouts
+        self.rows = []
+        self.tokens = []
+        self._applied = {}
+
+    def batch_create(self, table_id, records_fields, client_token=None):
+        self.tokens.append(client_token)
+        if client_token not in self._applied:
+            record_ids = [f'rec{len(self.rows) + index}' for index in range(len(records_fields))]
+            self.rows.extend(records_fields)
+            self._applied[client_token] = record_ids
+        if self.timeouts > 0:
+            self.timeouts -= 1
+            raise TimeoutError('read timed out')
+        records = [SimpleNamespace(record_id=record_id) for record_id in self._applied[client_token]]
+        return SimpleNamespace(code=0, msg='success', data=SimpleNamespace(records=records))
+
+
+class FakeClientPool:
+    """不连接飞书的客户端池，字段结构预先缓存在租户资源上"""
+
+    def __init__(self, schema):
+        self.schema = schema
+
+    def acquire(self, config, endpoint_limits, logger):
+        entry = BaseClientEntry(config, None, RateLimiterRegistry(endpoint_limits))
+        entry.set_schema(config.table_id, self.schema)
+        return entry
+
+    def release(self, entry):
+        pass
+
+
+class BatchCreateRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        schema = {name: {'field_id': f'fld_{name}', 'type': 1} for name in ('aweme_id', 'desc')}
+        config = BaseConfig(app_token='app', personal_base_token='token', table_id='tbl')
+        self.writer = FeishuWriter(
+            config,
+            retry_policy=RetryPolicy(max_attempts=3, base_delay=0),
+            client_pool=FakeClientPool(schema)
+        )
+        self.bitable = FakeBitable()
+        self.writer.rest_transport = self.bitable
+        self.videos = [{'aweme_id': str(index), 'title': f'视频 {index}'} for index in range(3)]
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_timeout_after_write_applied_does_not_duplicate(self):
+        outcomes = self.writer.create_records_batch(self.videos)
+
+        self.assertEqual(len(self.bitable.tokens), 2)
+        self.assertIsNotNone(self.bitable.tokens[0])
+        self.assertEqual(self.bitable.tokens[0], self.bitable.tokens[1])
+        self.assertEqual(len(self.bitable.rows), len(self.videos))
+        self.assertEqual(outcomes, [('rec0', None), ('rec1', None), ('rec2', None)])
+
+    def test_each_chunk_gets_its_own_token(self):
+        self.bitable.timeouts = 0
+        self.writer.create_records_batch(self.videos[:2])
+        self.writer.create_records_batch(self.videos[2:])
+
+        self.assertEqual(len(set(self.bitable.tokens)), 2)
+        self.assertEqual(len(self.bitable.rows), len(self.videos))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每页视频数学习的回退条件测试
+只有接口正常返回、还有下一页却没有条目时才回退；请求失败和最后一页不能压低并保存学习到的每页视频数
+"""
+
+import unittest
+
+from douyin_scraper import DouyinScraper
+
+
+class FakePageSizeStore:
+    """记录保存操作的每页视频数存储，已学习到每页请求80个"""
+
+    def __init__(self):
+        self.saved = []
+
+    def get_page_size(self, api_base_url):
+        return {'page_size': 80, 'confirmed_size': 40, 'max_size': None}
+
+    def save_page_size(self, api_base_url, page_size, confirmed_size, max_size):
+        self.saved.append((page_size, confirmed_size, max_size))
+
+
+def video(aweme_id):
+    return {'aweme_id': aweme_id, 'desc': '', 'create_time': 1700000000, 'author': {}, 'statistics': {}}
+
+
+class PageSizeRejectTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FakePageSizeStore()
+        self.scraper = DouyinScraper('http://douyin-api.test', page_size_store=self.store)
+        self.scraper.extract_sec_user_id = lambda url: 'SEC'
+        self.requested = []
+
+    def serve(self, *pages):
+        pages = list(pages)
+
+        def fetch_user_videos(sec_user_id, max_cursor=0, count=20, retry_count=0):
+            self.requested.append(count)
+            self.scraper.request_count += 1
+            return pages.pop(0)
+        self.scraper.fetch_user_videos = fetch_user_videos
+
+    def test_failed_request_keeps_learned_page_size(self):
+        # fetch_user_videos 在网络或HTTP错误重试耗尽后返回空字典
+        self.serve({})
+        progress = {}
+
+        self.assertEqual(self.scraper.fetch_all_videos('url', 1000, progress=progress), [])
+        self.assertEqual(self.requested, [80])
+        self.assertEqual(self.scraper.page_sizes.page_size, 80)
+        self.assertIsNone(self.scraper.page_sizes.max_size)
+        self.assertEqual(self.store.saved, [])
+        self.assertFalse(progress['complete'])
+
+    def test_empty_last_page_keeps_learned_page_size(self):
+        self.serve({'aweme_list': [], 'has_more': 0, 'max_cursor': 0})
+        progress = {}
+
+        self.assertEqual(self.scraper.fetch_all_videos('url', 1000, progress=progress), [])
+        self.assertEqual(self.requested, [80])
+        self.assertEqual(self.scraper.page_sizes.page_size, 80)
+        self.assertEqual(self.store.saved, [])
+        self.assertTrue(progress['complete'])
+
+    def test_empty_page_with_more_falls_back(self):
+        self.serve(
+            {'aweme_list': [], 'has_more': 1, 'max_cursor': 0},
+            {'aweme_list': [video('1'), video('2')], 'has_more': 0, 'max_cursor': 2}
+        )
+
+        videos = self.scraper.fetch_all_videos('url', 1000)
+
+        self.assertEqual([v['aweme_id'] for v in videos], ['1', '2'])
+        self.assertEqual(self.requested, [80, 40])
+        self.assertEqual(self.scraper.page_sizes.page_size, 40)
+        self.assertEqual(self.store.saved, [(40, 40, 40)])
+
+
+if __name__ == '__main__':
+    unittest.main()
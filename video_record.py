@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取器解析出的单条视频信息
+使用 __slots__ 保存固定字段，不为每条视频创建字典（每条约464字节 -> 152字节）；
+实现只读的 Mapping 接口（get / [] / in / keys / items / dict(record)），按字典使用视频信息的代码无需修改
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class VideoRecord(Mapping):
+    """单条视频信息，字段与 parse_video_info 原先返回的字典相同"""
+
+    __slots__ = (
+        'aweme_id', 'title', 'author_name', 'author_uid', 'create_time', 'create_timestamp',
+        'digg_count', 'comment_count', 'share_count', 'play_count', 'collect_count',
+        'video_url', 'cover_url', 'duration', 'is_top'
+    )
+
+    def __init__(self, aweme_id: str = '', title: str = '', author_name: str = '', author_uid: str = '',
+                 create_time: int = 0, create_timestamp: int = 0, digg_count: int = 0, comment_count: int = 0,
+                 share_count: int = 0, play_count: int = 0, collect_count: int = 0, video_url: str = '',
+                 cover_url: str = '', duration: int = 0, is_top: bool = False):
+        self.aweme_id = aweme_id
+        self.title = title
+        self.author_name = author_name
+        self.author_uid = author_uid
+        self.create_time = create_time  # 毫秒时间戳
+        self.create_timestamp = create_timestamp  # 接口返回的秒级时间戳
+        self.digg_count = digg_count
+        self.comment_count = comment_count
+        self.share_count = share_count
+        self.play_count = play_count
+        self.collect_count = collect_count
+        self.video_url = video_url
+        self.cover_url = cover_url
+        self.duration = duration
+        self.is_top = is_top  # 置顶视频，不按发布时间排列
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'VideoRecord':
+        """从字典创建（如断点中保存的视频），忽略未知字段"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典，用于JSON序列化"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # 写入端每条记录要调用十几次，直接读属性，不经过 Mapping 的 __getitem__ + KeyError
+        if key in _FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return f'VideoRecord(aweme_id={self.aweme_id!r}, title={self.title!r})'
+
+
+_FIELDS = frozenset(VideoRecord.__slots__)